@@ -0,0 +1,141 @@
+"""
+Benchmark for the Degrees loaders and searches
+
+Generates a synthetic co-star dataset, then times loading it with each backend
+and answering the same random queries with each search mode, reporting the
+counters from search.SearchStats. Collecting the counters does not change the
+search, so every row times what degrees.py runs without --stats.
+
+Usage: python benchmark.py [--people N] [--movies N] [--cast N] [--queries N] [--seed N] [--keep DIR]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+
+import degrees
+import search
+import snapshot
+
+
+def generate(directory, people, movies, cast, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv for a random dataset to
+    directory. Each movie has between 1 and 2 * cast - 1 stars, picked with
+    a skew towards low person ids so that some people are prolific hubs.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8") as f:
+        f.write("id,name,birth\n")
+        for person in range(people):
+            f.write(f'{person},"Person {person}",{1900 + person % 100}\n')
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8") as f:
+        f.write("id,title,year\n")
+        for movie in range(movies):
+            f.write(f'{movie},"Movie {movie}",{1920 + movie % 100}\n')
+
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8") as f:
+        f.write("person_id,movie_id\n")
+        for movie in range(movies):
+            size = min(people, rng.randint(1, 2 * cast - 1))
+            stars = {int(people * rng.random() ** 2) for _ in range(size)}
+            for person in stars:
+                f.write(f"{person},{movie}\n")
+
+
+def reset():
+    """
+    Clears everything load_data put into the degrees module.
+    """
+    degrees.names.clear()
+    degrees.people.clear()
+    degrees.movies.clear()
+    degrees.graph = None
+    degrees.name_index = None
+
+
+def time_load(directory, **options):
+    reset()
+    started = time.perf_counter()
+    degrees.load_data(directory, **options)
+    return time.perf_counter() - started
+
+
+def time_queries(pairs, bidirectional):
+    """
+    Runs every query and returns (per-query stats, number connected).
+    """
+    results = []
+    connected = 0
+    for source, target in pairs:
+        stats = search.SearchStats()
+        path = degrees.shortest_path(source, target, bidirectional=bidirectional, stats=stats)
+        connected += path is not None
+        results.append(stats)
+    return results, connected
+
+
+def report(label, results, connected):
+    times = sorted(stats.seconds * 1000 for stats in results)
+    print(f"  {label:<28} mean {statistics.mean(times):8.2f} ms"
+          f"  p50 {times[len(times) // 2]:8.2f} ms  max {times[-1]:8.2f} ms"
+          f"  expanded {statistics.mean(stats.expanded for stats in results):10.0f}"
+          f"  generated {statistics.mean(stats.generated for stats in results):11.0f}"
+          f"  connected {connected}/{len(results)}")
+
+
+def run(directory, queries, seed):
+    with open(os.path.join(directory, "people.csv"), encoding="utf-8") as f:
+        people_count = sum(1 for _ in f) - 1
+    rng = random.Random(seed + 1)
+    pairs = [(str(rng.randrange(people_count)), str(rng.randrange(people_count)))
+             for _ in range(queries)]
+
+    backends = [
+        ("dict", {"use_snapshot": False}),
+        ("compact", {"compact": True, "use_snapshot": False}),
+        ("snapshot", {"use_snapshot": True})
+    ]
+    for label, options in backends:
+        if label == "snapshot":
+            time_load(directory, compact=True, use_snapshot=False)
+            snapshot.write_snapshot(directory, degrees.graph, degrees.people, degrees.movies, degrees.names)
+        print(f"{label}: loaded in {time_load(directory, **options):.2f} s")
+        for mode, bidirectional in (("breadth-first", False), ("bidirectional", True)):
+            report(mode, *time_queries(pairs, bidirectional))
+
+    os.remove(snapshot.path_for(directory))
+    reset()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py [--people N] [--movies N] [--cast N] [--queries N] [--seed N] [--keep DIR]"
+    )
+    parser.add_argument("--people", type=int, default=20000)
+    parser.add_argument("--movies", type=int, default=10000)
+    parser.add_argument("--cast", type=int, default=8, help="average stars per movie")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--keep", metavar="DIR", help="write the dataset to DIR and keep it")
+    args = parser.parse_args()
+
+    if args.keep:
+        generate(args.keep, args.people, args.movies, args.cast, args.seed)
+        run(args.keep, args.queries, args.seed)
+        return
+
+    with tempfile.TemporaryDirectory() as directory:
+        print(f"Generating {args.people} people, {args.movies} movies, ~{args.cast} stars per movie...")
+        generate(directory, args.people, args.movies, args.cast, args.seed)
+        run(directory, args.queries, args.seed)
+
+
+if __name__ == "__main__":
+    main()
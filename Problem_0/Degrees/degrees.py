@@ -1,7 +1,14 @@
+import argparse
 import csv
 import sys
+import time
+from array import array
 
-from util import Node, StackFrontier, QueueFrontier
+import loader
+import search
+import snapshot
+from graph import CompactGraph, DictGraph
+from nameindex import NameIndex
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,10 +19,62 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# CompactGraph holding the people/movies incidence when loaded with compact=True,
+# in which case the "movies" and "stars" sets above are not built
+graph = None
 
-def load_data(directory):
+# NameIndex over the keys of names, for prefix and fuzzy suggestions,
+# built on the first suggestion unless load_data was asked to build it
+name_index = None
+
+# Release year per movie (0 if unknown) keyed like the active graph, built on first use
+movie_years = None
+
+
+def load_data(directory, compact=False, use_snapshot=True, index_names=False, progress=None):
     """
     Load data from CSV files into memory.
+
+    With compact=True the person/movie incidence is stored as an
+    integer-indexed CSR graph instead of per-person and per-movie sets,
+    streaming the CSVs in chunks (see loader.py). progress, if given, is
+    called after every chunk with (file name, rows read, elapsed seconds).
+
+    If use_snapshot is set and the directory holds a snapshot (see snapshot.py)
+    newer than the CSV files, it is memory-mapped instead of parsing the CSVs,
+    which always yields the compact backend.
+
+    With index_names=True the name index used by suggest_names is built
+    up front instead of on the first suggestion.
+    """
+    global graph, movie_years, name_index
+    movie_years = None
+    name_index = None
+    if use_snapshot and snapshot.is_fresh(directory):
+        loaded = snapshot.read_snapshot(directory)
+        if loaded is not None:
+            graph, snapshot_people, snapshot_movies, snapshot_names = loaded
+            people.update(snapshot_people)
+            movies.update(snapshot_movies)
+            names.update(snapshot_names)
+            if index_names:
+                build_name_index()
+            return
+
+    if compact:
+        graph = CompactGraph()
+        loader.stream_load(directory, graph, people, movies, names, progress=progress)
+    else:
+        _load_sets(directory)
+
+    if index_names:
+        build_name_index()
+
+
+def _load_sets(directory):
+    """
+    Load data from CSV files into the people and movies dicts,
+    with a set of movie_ids per person and of person_ids per movie.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -52,84 +111,254 @@ def load_data(directory):
                 pass
 
 
+def apply_delta(directory, progress=None):
+    """
+    Adds the new people, movies and credits listed in a delta directory
+    to the loaded data without reloading it. Returns the number of new credits.
+    """
+    global movie_years, name_index
+    added = loader.apply_delta(directory, graph, people, movies, names, progress=progress)
+    movie_years = None
+    name_index = None
+    return added
+
+
+def build_name_index():
+    """
+    Builds the prefix/fuzzy name index over the loaded names.
+    """
+    global name_index
+    name_index = NameIndex(names)
+    return name_index
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(description="Find the degrees of separation between two actors.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph as integer-indexed CSR arrays")
+    parser.add_argument("--progress", action="store_true",
+                        help="report rows read and rows/s while loading compact data")
+    parser.add_argument("--delta", metavar="DIR", action="append", default=[],
+                        help="apply new people, movies and credits from DIR after loading")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both ends of the path")
+    parser.add_argument("--large-cast", metavar="N", type=int,
+                        help="expand movies with more than N stars last in each search level")
+    parser.add_argument("--max-cast", metavar="N", type=int,
+                        help="ignore movies with more than N stars")
+    parser.add_argument("-k", type=int, default=1,
+                        help="list the k shortest connections")
+    parser.add_argument("--after", metavar="YEAR", type=int,
+                        help="only use movies released in or after YEAR")
+    parser.add_argument("--before", metavar="YEAR", type=int,
+                        help="only use movies released in or before YEAR")
+    parser.add_argument("--avoid", metavar="NAME", action="append", default=[],
+                        help="never pass through this person")
+    parser.add_argument("--stats", action="store_true",
+                        help="report the work done by the search")
+    args = parser.parse_args()
+    directory = args.directory
+
+    # -k, --after, --before and --avoid need the constrained search, which has no
+    # bidirectional or cast-size options
+    constrained = (args.k > 1 or args.after is not None or args.before is not None
+                   or bool(args.avoid))
+    if constrained and (args.bidirectional or args.large_cast is not None
+                        or args.max_cast is not None):
+        parser.error("--bidirectional, --large-cast and --max-cast cannot be combined "
+                     "with -k, --after, --before or --avoid")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    progress = loader.print_progress if args.progress else None
+    load_data(directory, compact=args.compact, progress=progress)
+    for delta in args.delta:
+        apply_delta(delta, progress=progress)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    name = input("Name: ")
+    source = person_id_for_name(name)
     if source is None:
-        sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+        sys.exit(not_found_message(name))
+    name = input("Name: ")
+    target = person_id_for_name(name)
     if target is None:
-        sys.exit("Person not found.")
+        sys.exit(not_found_message(name))
 
-    path = shortest_path(source, target)
+    stats = search.SearchStats() if args.stats else None
+    if constrained:
+        avoided = set()
+        for name in args.avoid:
+            person_id = person_id_for_name(name)
+            if person_id is None:
+                sys.exit(not_found_message(name))
+            avoided.add(person_id)
+        paths = constrained_paths(
+            source, target, k=args.k,
+            year_filter=year_range(args.after, args.before),
+            person_filter=(lambda person_id: person_id not in avoided) if avoided else None,
+            stats=stats
+        )
+    else:
+        path = shortest_path(source, target, bidirectional=args.bidirectional, stats=stats,
+                             large_cast=args.large_cast, max_cast=args.max_cast)
+        paths = [] if path is None else [path]
+    if stats is not None:
+        print(f"Search: {stats}")
 
-    if path is None:
+    if not paths:
         print("Not connected.")
-    else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+    for number, path in enumerate(paths, 1):
+        if len(paths) > 1:
+            print(f"Connection {number}:")
+        print_path(source, path)
 
 
-def shortest_path(source, target):
+def print_path(source, path):
+    """
+    Prints a (movie_id, person_id) path starting at source, one step per line.
+    """
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def active_graph():
+    """
+    Returns the loaded graph backend: the CompactGraph if one was built,
+    otherwise an adapter over the people and movies dicts.
+    """
+    if graph is not None:
+        return graph
+    return DictGraph(people, movies)
+
+
+def shortest_path(source, target, bidirectional=False, stats=None, large_cast=None, max_cast=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    With bidirectional=True the search grows from both the source and
+    the target, expanding the smaller frontier each step.
+
+    Each movie's cast is expanded only once, whichever backend is loaded.
+    Movies with more than large_cast stars are expanded last within each
+    level, and movies with more than max_cast stars are ignored, which can
+    miss or lengthen paths.
+
+    If stats (a search.SearchStats) is given, the nodes expanded, neighbors
+    generated, peak frontier size and wall time of the search are added to it.
+    The same search runs with or without stats.
+
+    A person is 0 degrees from themselves, so the path from source to source
+    is [] on every backend (the original search returned a one-movie loop
+    back to the source instead).
+
     If no possible path, returns None.
     """
-    # initialize the frontier to the starting position
-    node = Node(source, None, None)  # (person_id (state), parent, movie_id (action))
-    frontier = QueueFrontier()
-    frontier.add(node)
-    explored = set()
+    started = time.perf_counter()
+    backend = active_graph()
+    find = search.bidirectional if bidirectional else search.breadth_first
+    path = find(backend, backend.index(source), backend.index(target),
+                stats=stats, large_cast=large_cast, max_cast=max_cast)
+    if stats is not None:
+        stats.seconds += time.perf_counter() - started
+    return None if path is None else backend.to_ids(path)
+
+
+def constrained_paths(source, target, k=1, year_filter=None, person_filter=None, stats=None):
+    """
+    Returns up to k shortest lists of (movie_id, person_id) pairs that connect
+    the source to the target, shortest first, as a list (empty if none).
+
+    year_filter(year) decides whether a movie may be used, given its release
+    year as an int (None if unknown), and person_filter(person_id) whether a
+    person may appear on the path after the source. Years come from the
+    precomputed per-movie array of movie_year_array, and every filter is
+    evaluated at most once per movie or person and query.
+    """
+    started = time.perf_counter()
+    backend = active_graph()
+
+    movie_allowed = None
+    if year_filter is not None:
+        years = movie_year_array()
+        movie_allowed = _memoize(lambda movie: year_filter(years[movie] or None))
+
+    person_allowed = None
+    if person_filter is not None:
+        person_allowed = _memoize(lambda person: person_filter(backend.person_id(person)))
 
-    # use BFS to find the shortest path between the source and the target
-    while True:
-        # no solution found
-        if frontier.empty():
-            return None
+    paths = search.k_shortest(backend, backend.index(source), backend.index(target), k,
+                              movie_allowed, person_allowed, stats=stats)
+    if stats is not None:
+        stats.seconds += time.perf_counter() - started
+    return [backend.to_ids(path) for path in paths]
 
-        # possible solutions found
+
+def year_range(after=None, before=None):
+    """
+    Returns a year_filter for constrained_paths keeping movies released
+    between after and before (inclusive), or None if both are None.
+    Movies with an unknown year are dropped by any bound.
+    """
+    if after is None and before is None:
+        return None
+
+    def in_range(year):
+        return (year is not None
+                and (after is None or year >= after)
+                and (before is None or year <= before))
+    return in_range
+
+
+def movie_year_array():
+    """
+    Returns the release year of every movie as an int, 0 if unknown:
+    an array indexed by movie index for the compact backend,
+    otherwise a dict keyed by movie_id.
+    """
+    global movie_years
+    if movie_years is None:
+        if graph is not None:
+            movie_years = array("i", (_year(movies[movie_id]["year"]) for movie_id in graph.movie_ids))
         else:
-            node = frontier.remove()  # remove the first node from the queue
-            if node.action is not None:
-                explored.add(node.state)  # add the node to the explored set, EXCEPT for the starting node
+            movie_years = {movie_id: _year(movie["year"]) for movie_id, movie in movies.items()}
+    return movie_years
+
 
-            # add the neighbors of the node to the frontier, then check if the target is reached
-            for neighbor in neighbors_for_person(node.state):
-                neighbor = Node(neighbor[1], node, neighbor[0])  # (related star id, parent node, movie id)
-                if neighbor.state not in explored and not frontier.contains_state(neighbor.state):
+def _year(value):
+    try:
+        return int(value)
+    except ValueError:
+        return 0
 
-                    # actual solution found
-                    if neighbor.state == target:
-                        shortestPath = []
 
-                        # append the solution to the list
-                        while neighbor.parent is not None:
-                            shortestPath.append((neighbor.action, neighbor.state))  # (movie id, person id)
-                            neighbor = neighbor.parent
+def _memoize(predicate):
+    """
+    Caches a one-argument predicate for the duration of a query.
+    """
+    cache = {}
+
+    def cached(key):
+        result = cache.get(key)
+        if result is None:
+            result = cache[key] = bool(predicate(key))
+        return result
+    return cached
 
-                        # reverse the list to get the correct order, then return it
-                        shortestPath.reverse()
-                        return shortestPath
 
-                    # solution not found yet, add the current neighbor to the frontier
-                    else:
-                        frontier.add(neighbor)
+def person_ids_for_name(name):
+    """
+    Returns all IMDB ids for a person's name, without prompting.
+    """
+    return sorted(names.get(name.lower(), set()))
 
 
 def person_id_for_name(name):
@@ -137,7 +366,7 @@ def person_id_for_name(name):
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    person_ids = person_ids_for_name(name)
     if len(person_ids) == 0:
         return None
     elif len(person_ids) > 1:
@@ -158,11 +387,34 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def suggest_names(name, limit=5):
+    """
+    Returns up to limit display names similar to name, ranked by
+    exact, then prefix, then fuzzy (trigram) match.
+    """
+    index = name_index if name_index is not None else build_name_index()
+    return [people[min(names[key])]["name"] for key in index.suggest(name, limit)]
+
+
+def not_found_message(name):
+    """
+    Returns the "Person not found." message, with suggestions if there are any.
+    """
+    suggestions = suggest_names(name)
+    if not suggestions:
+        return "Person not found."
+    return "Person not found. Did you mean: " + ", ".join(suggestions) + "?"
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[person])
+                for movie, person in graph.neighbors(graph.person_index[person_id])}
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
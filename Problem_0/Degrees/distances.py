@@ -0,0 +1,216 @@
+"""
+Single-source degrees ("Bacon numbers") for the compact Degrees graph
+
+A DistanceTable holds, for one source person, the degree of separation of
+every person plus the parent person and movie on one shortest path, as
+dense int arrays indexed like the CompactGraph. Any path from the source is
+then read back in O(path length) without searching again.
+
+Saved tables record a checksum of the graph they were built on, and are
+rebuilt once the credits change, including through a delta.
+
+Usage: python distances.py [directory] NAME [--to NAME]
+"""
+
+import argparse
+import os
+import struct
+import sys
+import zlib
+from array import array
+from collections import Counter
+
+import degrees
+
+MAGIC = b"DEGDIST\0"
+VERSION = 2
+
+# magic, version, person count, movie count, source index, graph checksum
+HEADER = struct.Struct("<8sIQQQI")
+
+UNREACHED = -1
+
+
+class DistanceTable():
+
+    def __init__(self, source, distance, parent, movie, movie_count, checksum):
+        self.source = source
+        self.distance = distance
+        self.parent = parent
+        self.movie = movie
+        self.movie_count = movie_count
+        self.checksum = checksum
+
+    @classmethod
+    def build(cls, graph, source):
+        """
+        Runs one BFS over a CompactGraph from the source person index.
+        """
+        count = graph.person_count()
+        distance = array("i", [UNREACHED]) * count
+        parent = array("i", [UNREACHED]) * count
+        movie = array("i", [UNREACHED]) * count
+
+        # each movie's cast is enumerated once, from the first person reaching it
+        seen_movies = bytearray(graph.movie_count())
+        distance[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            next_frontier = []
+            for person in frontier:
+                for via in graph.movies_of(person):
+                    if seen_movies[via]:
+                        continue
+                    seen_movies[via] = 1
+                    for star in graph.stars_of(via):
+                        if distance[star] == UNREACHED:
+                            distance[star] = depth
+                            parent[star] = person
+                            movie[star] = via
+                            next_frontier.append(star)
+            frontier = next_frontier
+        return cls(source, distance, parent, movie, graph.movie_count(), graph_checksum(graph))
+
+    def degrees(self, target):
+        """
+        Returns the degree of separation of a person index, or None if unreachable.
+        """
+        value = self.distance[target]
+        return None if value == UNREACHED else value
+
+    def path(self, target):
+        """
+        Returns the (movie index, person index) path from the source
+        to the target, or None if unreachable.
+        """
+        if self.distance[target] == UNREACHED:
+            return None
+        path = []
+        while target != self.source:
+            path.append((self.movie[target], target))
+            target = self.parent[target]
+        path.reverse()
+        return path
+
+    def histogram(self):
+        """
+        Returns a Counter of degree -> number of people, with unreachable
+        people counted under None.
+        """
+        counts = Counter(self.distance)
+        if UNREACHED in counts:
+            counts[None] = counts.pop(UNREACHED)
+        return counts
+
+    def save(self, filename):
+        # write to a temporary file first so readers never see a partial table
+        temporary = filename + ".tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.distance), self.movie_count,
+                                self.source, self.checksum))
+            for section in (self.distance, self.parent, self.movie):
+                section.tofile(f)
+        os.replace(temporary, filename)
+
+    @classmethod
+    def load(cls, filename, graph):
+        """
+        Loads a saved table, or returns None if it is missing, truncated
+        or was built on a graph with other credits.
+        """
+        try:
+            f = open(filename, "rb")
+        except OSError:
+            return None
+        with f:
+            header = f.read(HEADER.size)
+            if len(header) != HEADER.size:
+                return None
+            magic, version, person_count, movie_count, source, checksum = HEADER.unpack(header)
+            if (magic != MAGIC or version != VERSION
+                    or person_count != graph.person_count()
+                    or movie_count != graph.movie_count()
+                    or checksum != graph_checksum(graph)):
+                return None
+            sections = []
+            for _ in range(3):
+                section = array("i")
+                try:
+                    section.fromfile(f, person_count)
+                except (EOFError, ValueError):
+                    return None
+                sections.append(section)
+        return cls(source, *sections, movie_count, checksum)
+
+
+def graph_checksum(graph):
+    """
+    Returns a CRC-32 of the credits of a CompactGraph: its person -> movies
+    CSR arrays and any overlay credits added since they were built.
+    """
+    checksum = zlib.crc32(memoryview(graph.person_offsets).cast("B"))
+    checksum = zlib.crc32(memoryview(graph.person_movies).cast("B"), checksum)
+    for person in sorted(graph.extra_movies):
+        extra = array("i", [person]) + array("i", graph.extra_movies[person])
+        checksum = zlib.crc32(extra.tobytes(), checksum)
+    return checksum
+
+
+def path_for(directory, person_id):
+    return os.path.join(directory, f"distances-{person_id}.bin")
+
+
+def table_for(directory, person_id):
+    """
+    Returns the DistanceTable for a person id on the loaded compact graph,
+    loading it from directory if saved there, else building and saving it.
+    """
+    graph = degrees.graph
+    filename = path_for(directory, person_id)
+    table = DistanceTable.load(filename, graph)
+    if table is None or table.source != graph.index(person_id):
+        table = DistanceTable.build(graph, graph.index(person_id))
+        table.save(filename)
+    return table
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python distances.py [directory] NAME [--to NAME]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("name")
+    parser.add_argument("--to", metavar="NAME", help="print the path to this person")
+    args = parser.parse_args()
+
+    # Load data from files into memory
+    print("Loading data...")
+    degrees.load_data(args.directory, compact=True)
+    print("Data loaded.")
+
+    source = degrees.person_id_for_name(args.name)
+    if source is None:
+        sys.exit("Person not found.")
+    table = table_for(args.directory, source)
+
+    if args.to is None:
+        histogram = table.histogram()
+        for distance in sorted(key for key in histogram if key is not None):
+            print(f"{distance} degrees: {histogram[distance]}")
+        print(f"Not connected: {histogram.get(None, 0)}")
+        return
+
+    target = degrees.person_id_for_name(args.to)
+    if target is None:
+        sys.exit("Person not found.")
+
+    graph = degrees.graph
+    path = table.path(graph.index(target))
+    if path is None:
+        print("Not connected.")
+    else:
+        degrees.print_path(source, graph.to_ids(path))
+
+
+if __name__ == "__main__":
+    main()
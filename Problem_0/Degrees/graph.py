@@ -0,0 +1,234 @@
+"""
+Compact integer-indexed people/movies graph
+"""
+
+from array import array
+
+
+class CompactGraph():
+    """
+    Bipartite people/movies graph stored as CSR (compressed sparse row) arrays.
+
+    Person and movie ids are interned to dense ints. The movies of person i are
+    person_movies[person_offsets[i]:person_offsets[i + 1]], and the stars of
+    movie j are movie_stars[movie_offsets[j]:movie_offsets[j + 1]].
+
+    Credits added after build (see add_credit) are kept in small per-row
+    overlays on top of the CSR arrays until compact() merges them in.
+    """
+
+    def __init__(self):
+        # dense index <-> IMDB id
+        self.person_ids = []
+        self.person_index = {}
+        self.movie_ids = []
+        self.movie_index = {}
+
+        # CSR incidence arrays
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("i", [0])
+        self.movie_stars = array("i")
+
+        # credits added since the last build: person -> [movies], movie -> [people]
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+    def add_person(self, person_id):
+        """
+        Interns a person id and returns its dense index.
+        """
+        index = self.person_index.get(person_id)
+        if index is None:
+            index = len(self.person_ids)
+            self.person_index[person_id] = index
+            self.person_ids.append(person_id)
+        return index
+
+    def add_movie(self, movie_id):
+        """
+        Interns a movie id and returns its dense index.
+        """
+        index = self.movie_index.get(movie_id)
+        if index is None:
+            index = len(self.movie_ids)
+            self.movie_index[movie_id] = index
+            self.movie_ids.append(movie_id)
+        return index
+
+    def build(self, edge_people, edge_movies):
+        """
+        Builds both CSR directions from parallel arrays of
+        (person index, movie index) credits. Duplicate credits are dropped.
+        """
+        person_count = len(self.person_ids)
+        movie_count = len(self.movie_ids)
+
+        # person -> movies, bucketed with a counting sort
+        offsets, targets = _bucket(edge_people, edge_movies, person_count)
+
+        # drop duplicate credits row by row
+        self.person_offsets = array("i", [0])
+        self.person_movies = array("i")
+        for person in range(person_count):
+            row = sorted(set(targets[offsets[person]:offsets[person + 1]]))
+            self.person_movies.extend(row)
+            self.person_offsets.append(len(self.person_movies))
+
+        # movie -> people, derived from the de-duplicated person rows
+        sources = array("i")
+        for person in range(person_count):
+            start, end = self.person_offsets[person], self.person_offsets[person + 1]
+            sources.extend([person] * (end - start))
+        self.movie_offsets, self.movie_stars = _bucket(
+            self.person_movies, sources, movie_count
+        )
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+    def add_credit(self, person, movie):
+        """
+        Adds a (person index, movie index) credit on top of the built arrays.
+        Returns False if the credit was already present.
+        """
+        if movie in self.movies_of(person):
+            return False
+        self.extra_movies.setdefault(person, []).append(movie)
+        self.extra_stars.setdefault(movie, []).append(person)
+        return True
+
+    def compact(self):
+        """
+        Rebuilds the CSR arrays with all overlay credits merged in.
+        """
+        edge_people, edge_movies = array("i"), array("i")
+        for person in range(self.person_count()):
+            movies = self.movies_of(person)
+            edge_people.extend([person] * len(movies))
+            edge_movies.extend(movies)
+        self.build(edge_people, edge_movies)
+
+    def person_count(self):
+        return len(self.person_ids)
+
+    def movie_count(self):
+        return len(self.movie_ids)
+
+    def movies_of(self, person):
+        """
+        Returns the movie indices a person (by index) starred in.
+        """
+        movies = _row(self.person_offsets, self.person_movies, person)
+        extra = self.extra_movies.get(person)
+        return movies if extra is None else list(movies) + extra
+
+    def stars_of(self, movie):
+        """
+        Returns the person indices who starred in a movie (by index).
+        """
+        stars = _row(self.movie_offsets, self.movie_stars, movie)
+        extra = self.extra_stars.get(movie)
+        return stars if extra is None else list(stars) + extra
+
+    def neighbors(self, person):
+        """
+        Yields (movie index, person index) pairs for people
+        who starred with a given person.
+        """
+        if self.extra_movies or self.extra_stars:
+            for movie in self.movies_of(person):
+                for star in self.stars_of(movie):
+                    yield movie, star
+            return
+
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+        if person + 1 >= len(person_offsets):
+            return
+        for i in range(person_offsets[person], person_offsets[person + 1]):
+            movie = person_movies[i]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def index(self, person_id):
+        """
+        Returns the dense index of a person id.
+        """
+        return self.person_index[person_id]
+
+    def person_id(self, person):
+        """
+        Returns the IMDB id of a person index.
+        """
+        return self.person_ids[person]
+
+    def to_ids(self, path):
+        """
+        Converts a path of index pairs to (movie_id, person_id) pairs.
+        """
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+
+class DictGraph():
+    """
+    Adapter exposing the people/movies dicts of degrees.py
+    through the same interface as CompactGraph, keyed by IMDB ids.
+    """
+
+    def __init__(self, people, movies):
+        self.people = people
+        self.movies = movies
+
+    def person_count(self):
+        return len(self.people)
+
+    def movie_count(self):
+        return len(self.movies)
+
+    def movies_of(self, person_id):
+        return self.people[person_id]["movies"]
+
+    def stars_of(self, movie_id):
+        return self.movies[movie_id]["stars"]
+
+    def neighbors(self, person_id):
+        for movie_id in self.people[person_id]["movies"]:
+            for star_id in self.movies[movie_id]["stars"]:
+                yield movie_id, star_id
+
+    def index(self, person_id):
+        return person_id
+
+    def person_id(self, person_id):
+        return person_id
+
+    def to_ids(self, path):
+        return list(path)
+
+
+def _row(offsets, values, key):
+    """
+    Returns the CSR row of key, which is empty for keys interned after the build.
+    """
+    if key + 1 >= len(offsets):
+        return ()
+    return values[offsets[key]:offsets[key + 1]]
+
+
+def _bucket(keys, values, key_count):
+    """
+    Groups values by key with a counting sort.
+    Returns (offsets, grouped values) arrays.
+    """
+    offsets = array("i", [0]) * (key_count + 1)
+    for key in keys:
+        offsets[key + 1] += 1
+    for i in range(key_count):
+        offsets[i + 1] += offsets[i]
+
+    cursor = array("i", offsets)
+    grouped = array("i", [0]) * len(keys)
+    for key, value in zip(keys, values):
+        grouped[cursor[key]] = value
+        cursor[key] += 1
+    return offsets, grouped
@@ -0,0 +1,134 @@
+"""
+Streaming CSV ingestion for Degrees
+
+Rows are read with csv.reader in chunks and written straight into the target
+structures: credits go into int arrays for the CompactGraph build rather
+than into per-row dicts and per-person sets. A progress callback is called
+after every chunk with the file name, rows read so far and elapsed seconds.
+
+Delta directories hold people.csv, movies.csv and/or stars.csv files with the
+same headers as a dataset, listing only new records, and are applied on top of
+an already loaded dataset without reloading it.
+"""
+
+import csv
+import itertools
+import os
+import sys
+import time
+from array import array
+
+CHUNK_SIZE = 100000
+
+
+def read_chunks(filename, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Yields (header, rows) for chunks of up to chunk_size rows of a CSV file,
+    calling progress after every chunk.
+    """
+    start = time.perf_counter()
+    rows = 0
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        while True:
+            chunk = list(itertools.islice(reader, chunk_size))
+            if not chunk:
+                break
+            rows += len(chunk)
+            yield header, chunk
+            if progress is not None:
+                progress(os.path.basename(filename), rows, time.perf_counter() - start)
+
+
+def print_progress(filename, rows, elapsed):
+    """
+    Progress callback printing rows read and throughput to stderr.
+    """
+    rate = rows / elapsed if elapsed else 0
+    print(f"{filename}: {rows:,} rows ({rate:,.0f} rows/s)", file=sys.stderr)
+
+
+def stream_load(directory, graph, people, movies, names, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Loads a dataset directory into a CompactGraph and the people, movies
+    and names dicts, building the CSR arrays once all credits are read.
+    """
+    _load_people(directory, graph, people, names, chunk_size, progress)
+    _load_movies(directory, graph, movies, chunk_size, progress)
+
+    edge_people, edge_movies = array("i"), array("i")
+    for header, chunk in read_chunks(f"{directory}/stars.csv", chunk_size, progress):
+        person_column, movie_column = header.index("person_id"), header.index("movie_id")
+        person_index, movie_index = graph.person_index, graph.movie_index
+        for row in chunk:
+            person = person_index.get(row[person_column])
+            movie = movie_index.get(row[movie_column])
+            if person is not None and movie is not None:
+                edge_people.append(person)
+                edge_movies.append(movie)
+    graph.build(edge_people, edge_movies)
+
+
+def apply_delta(directory, graph, people, movies, names, chunk_size=CHUNK_SIZE, progress=None):
+    """
+    Applies the delta files in directory to a loaded dataset. graph is the
+    CompactGraph, or None when the people and movies dicts hold the sets.
+    Returns the number of new credits.
+    """
+    if os.path.exists(f"{directory}/people.csv"):
+        _load_people(directory, graph, people, names, chunk_size, progress)
+    if os.path.exists(f"{directory}/movies.csv"):
+        _load_movies(directory, graph, movies, chunk_size, progress)
+    if not os.path.exists(f"{directory}/stars.csv"):
+        return 0
+
+    added = 0
+    for header, chunk in read_chunks(f"{directory}/stars.csv", chunk_size, progress):
+        person_column, movie_column = header.index("person_id"), header.index("movie_id")
+        for row in chunk:
+            person_id, movie_id = row[person_column], row[movie_column]
+            if person_id not in people or movie_id not in movies:
+                continue
+            if graph is not None:
+                added += graph.add_credit(graph.person_index[person_id], graph.movie_index[movie_id])
+            elif movie_id not in people[person_id]["movies"]:
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
+                added += 1
+    return added
+
+
+def _load_people(directory, graph, people, names, chunk_size, progress):
+    for header, chunk in read_chunks(f"{directory}/people.csv", chunk_size, progress):
+        id_column, name_column, birth_column = (
+            header.index("id"), header.index("name"), header.index("birth")
+        )
+        for row in chunk:
+            person_id, name = row[id_column], row[name_column]
+            if person_id in people:
+                continue
+            people[person_id] = {"name": name, "birth": row[birth_column]}
+            if graph is not None:
+                graph.add_person(person_id)
+            else:
+                people[person_id]["movies"] = set()
+            names.setdefault(name.lower(), set()).add(person_id)
+
+
+def _load_movies(directory, graph, movies, chunk_size, progress):
+    for header, chunk in read_chunks(f"{directory}/movies.csv", chunk_size, progress):
+        id_column, title_column, year_column = (
+            header.index("id"), header.index("title"), header.index("year")
+        )
+        for row in chunk:
+            movie_id = row[id_column]
+            if movie_id in movies:
+                continue
+            movies[movie_id] = {"title": row[title_column], "year": row[year_column]}
+            if graph is not None:
+                graph.add_movie(movie_id)
+            else:
+                movies[movie_id]["stars"] = set()
@@ -0,0 +1,114 @@
+"""
+Prefix and fuzzy lookup over the lowercase names of a Degrees dataset
+"""
+
+from array import array
+from bisect import bisect_left
+from collections import defaultdict
+
+
+def trigrams(name):
+    """
+    Returns the set of padded character trigrams of a lowercase name.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class NameIndex():
+    """
+    Index over the keys of the degrees.names dict (lowercase names).
+
+    Keys are kept in a sorted list for prefix search by bisection, and each
+    trigram maps to an int array of key positions for fuzzy matching.
+    """
+
+    # posting lists scanned per fuzzy query, rarest trigrams first
+    CANDIDATE_BUDGET = 20000
+
+    # candidates rescored exactly per requested suggestion
+    RESCORED = 20
+
+    # lowest Jaccard similarity a fuzzy match may have
+    MIN_SIMILARITY = 0.3
+
+    def __init__(self, names):
+        self.keys = sorted(names)
+        self.sizes = array("H")
+        postings = defaultdict(lambda: array("i"))
+        for position, key in enumerate(self.keys):
+            grams = trigrams(key)
+            self.sizes.append(min(len(grams), 0xFFFF))
+            for gram in grams:
+                postings[gram].append(position)
+        self.postings = dict(postings)
+
+    def __len__(self):
+        return len(self.keys)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to limit names starting with prefix, in sorted order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        for position in range(bisect_left(self.keys, prefix), len(self.keys)):
+            key = self.keys[position]
+            if not key.startswith(prefix) or len(matches) == limit:
+                break
+            matches.append(key)
+        return matches
+
+    def fuzzy(self, query, limit=10):
+        """
+        Returns up to limit (score, name) pairs ranked by trigram
+        Jaccard similarity to query, best first, leaving out names less
+        similar than MIN_SIMILARITY.
+
+        Candidates are gathered from the rarest query trigrams first, up to
+        CANDIDATE_BUDGET postings, and the best of them are rescored exactly.
+        """
+        grams = trigrams(query.lower())
+        lists = sorted((self.postings[gram] for gram in grams if gram in self.postings), key=len)
+
+        # count shared trigrams per candidate, bounded by the scan budget
+        shared = defaultdict(int)
+        scanned = 0
+        for positions in lists:
+            if scanned and scanned + len(positions) > self.CANDIDATE_BUDGET:
+                break
+            scanned += len(positions)
+            for position in positions:
+                shared[position] += 1
+
+        # rescore the most promising candidates against all query trigrams
+        candidates = sorted(shared, key=shared.get, reverse=True)[:self.RESCORED * limit]
+        scored = []
+        for position in candidates:
+            key = self.keys[position]
+            common = len(grams & trigrams(key))
+            score = common / (len(grams) + self.sizes[position] - common)
+            if score >= self.MIN_SIMILARITY:
+                scored.append((score, key))
+        scored.sort(key=lambda pair: (-pair[0], pair[1]))
+        return scored[:limit]
+
+    def suggest(self, query, limit=10):
+        """
+        Returns up to limit distinct names for a query: an exact match first,
+        then prefix matches, then fuzzy matches by similarity.
+        """
+        query = query.lower()
+        suggestions = []
+        position = bisect_left(self.keys, query)
+        if position < len(self.keys) and self.keys[position] == query:
+            suggestions.append(query)
+        for key in self.prefix(query, limit):
+            if key not in suggestions:
+                suggestions.append(key)
+        for _, key in self.fuzzy(query, limit):
+            if len(suggestions) >= limit:
+                break
+            if key not in suggestions:
+                suggestions.append(key)
+        return suggestions[:limit]
@@ -0,0 +1,345 @@
+"""
+Graph search algorithms shared by the Degrees backends
+
+Every function takes a graph exposing movies_of(person) and stars_of(movie),
+and returns paths as lists of (movie, person) pairs in source-to-target order,
+not including the source itself.
+
+Movies are treated as hyperedges: a search enumerates a movie's cast the
+first time the movie is reached and skips it afterwards, since every star it
+could lead to has already been discovered at that depth. Movies with more
+than large_cast stars are deferred to the end of each BFS level, so a target
+reachable through smaller casts is found without enumerating them, and
+movies with more than max_cast stars are skipped entirely (which may miss
+or lengthen paths).
+
+constrained and k_shortest apply optional movie_allowed(movie) and
+person_allowed(person) predicates to every step.
+"""
+
+import heapq
+import itertools
+
+
+class SearchStats():
+    """
+    Work counters filled in by a search when passed as stats=. The searches
+    count their work either way, so passing stats never changes the search.
+    """
+
+    def __init__(self):
+        self.expanded = 0
+        self.generated = 0
+        self.peak_frontier = 0
+        self.seconds = 0.0
+
+    def record(self, expanded, generated, peak_frontier):
+        self.expanded += expanded
+        self.generated += generated
+        self.peak_frontier = max(self.peak_frontier, peak_frontier)
+
+    def as_dict(self):
+        return {
+            "expanded": self.expanded,
+            "generated": self.generated,
+            "peak_frontier": self.peak_frontier,
+            "seconds": self.seconds
+        }
+
+    def __repr__(self):
+        return (f"{self.expanded} nodes expanded, {self.generated} neighbors generated, "
+                f"peak frontier {self.peak_frontier}, {self.seconds * 1000:.2f} ms")
+
+
+def breadth_first(graph, source, target, stats=None, large_cast=None, max_cast=None):
+    """
+    Returns the shortest path from source to target found by
+    a level-by-level BFS, or None if they are not connected.
+    """
+    if source == target:
+        return []
+
+    # parents[person] = (parent person, movie), filled in BFS order
+    parents = {source: None}
+    seen_movies = set()
+    frontier = [source]
+    counters = SearchStats()
+    path = None
+    while frontier and path is None:
+        counters.record(0, 0, len(frontier))
+        next_frontier = []
+        for person, movie, star in expand_level(graph, frontier, seen_movies, counters, large_cast, max_cast):
+            if star in parents:
+                continue
+            parents[star] = (person, movie)
+            if star == target:
+                path = trace(parents, target)
+                break
+            next_frontier.append(star)
+        frontier = next_frontier
+
+    if stats is not None:
+        stats.record(counters.expanded, counters.generated, counters.peak_frontier)
+    return path
+
+
+def bidirectional(graph, source, target, stats=None, large_cast=None, max_cast=None):
+    """
+    Returns the shortest path from source to target found by
+    growing BFS levels from both ends, always expanding the smaller frontier,
+    or None if they are not connected.
+    """
+    if source == target:
+        return []
+
+    # per side: parents map, depth map, expanded movies and current frontier
+    forward = ({source: None}, {source: 0}, set(), [source])
+    backward = ({target: None}, {target: 0}, set(), [target])
+    counters = SearchStats()
+    path = None
+
+    while forward[3] and backward[3] and path is None:
+        counters.record(0, 0, len(forward[3]) + len(backward[3]))
+        side, other = (forward, backward) if len(forward[3]) <= len(backward[3]) else (backward, forward)
+        parents, depth, seen_movies, frontier = side
+        other_parents, other_depth = other[0], other[1]
+
+        # expand one full level, keeping the shortest meeting found on it
+        best = None
+        next_frontier = []
+        for person, movie, star in expand_level(graph, frontier, seen_movies, counters, large_cast, max_cast):
+            if star in other_parents:
+                length = depth[person] + 1 + other_depth[star]
+                if best is None or length < best[0]:
+                    best = (length, person, movie, star)
+            if star in parents:
+                continue
+            parents[star] = (person, movie)
+            depth[star] = depth[person] + 1
+            next_frontier.append(star)
+
+        if best is not None:
+            _, person, movie, star = best
+            if side is forward:
+                path = _join(forward[0], backward[0], person, movie, star)
+            else:
+                path = _join(forward[0], backward[0], star, movie, person)
+
+        frontier[:] = next_frontier
+
+    if stats is not None:
+        stats.record(counters.expanded, counters.generated, counters.peak_frontier)
+    return path
+
+
+def expand_level(graph, frontier, seen_movies, counters, large_cast=None, max_cast=None):
+    """
+    Yields (person, movie, star) for every not yet expanded movie of the
+    people in frontier, adding those movies to seen_movies. Movies with more
+    than large_cast stars are yielded after all others, and movies with more
+    than max_cast stars are skipped.
+    """
+    deferred = []
+    for person in frontier:
+        counters.expanded += 1
+        for movie in graph.movies_of(person):
+            if movie in seen_movies:
+                continue
+            seen_movies.add(movie)
+            stars = graph.stars_of(movie)
+            if max_cast is not None and len(stars) > max_cast:
+                continue
+            if large_cast is not None and len(stars) > large_cast:
+                deferred.append((person, movie, stars))
+                continue
+            counters.generated += len(stars)
+            for star in stars:
+                yield person, movie, star
+
+    for person, movie, stars in deferred:
+        counters.generated += len(stars)
+        for star in stars:
+            yield person, movie, star
+
+
+def constrained(graph, source, target, movie_allowed=None, person_allowed=None, stats=None):
+    """
+    Returns the shortest path from source to target that only uses movies
+    for which movie_allowed(movie) is true and only visits people (other than
+    the source) for which person_allowed(person) is true, or None.
+    """
+    counters = SearchStats()
+    path = _spur_search(graph, source, target, movie_allowed, person_allowed, counters)
+    if stats is not None:
+        stats.record(counters.expanded, counters.generated, counters.peak_frontier)
+    return path
+
+
+def k_shortest(graph, source, target, k, movie_allowed=None, person_allowed=None, stats=None):
+    """
+    Returns up to k distinct paths from source to target in order of length,
+    honouring the same movie_allowed and person_allowed predicates as
+    constrained.
+
+    This is Yen's algorithm on the bipartite people/movies graph: a path
+    never repeats a person or a movie, so no path is a shortcut-able detour
+    through a movie it already used.
+    """
+    counters = SearchStats()
+    first = _spur_search(graph, source, target, movie_allowed, person_allowed, counters)
+    paths = [] if first is None else [first]
+    found = {tuple(first)} if first is not None else set()
+    candidates = []
+    counter = itertools.count()
+
+    while paths and len(paths) < k:
+        previous = paths[-1]
+        people = [source] + [person for _, person in previous]
+
+        # deviate from the previous path at every person and every movie on it
+        for i in range(len(previous)):
+            root = previous[:i]
+            root_movies = {movie for movie, _ in root}
+            sharing = [path for path in paths if len(path) > i and path[:i] == root]
+
+            # leave people[i] through a movie no accepted path with this root took
+            spur_path = _spur_search(
+                graph, people[i], target, movie_allowed, person_allowed, counters,
+                excluded_people=people[:i], excluded_movies=root_movies,
+                banned_movies={path[i][0] for path in sharing}
+            )
+            _add_candidate(candidates, found, counter, root, spur_path)
+
+            # or take the same movie out of people[i] but leave it for another star
+            movie = previous[i][0]
+            spur_path = _spur_search(
+                graph, people[i], target, movie_allowed, person_allowed, counters,
+                excluded_people=people[:i], excluded_movies=root_movies,
+                first_movie=movie,
+                banned_stars={path[i][1] for path in sharing if path[i][0] == movie}
+            )
+            _add_candidate(candidates, found, counter, root, spur_path)
+
+        if not candidates:
+            break
+        paths.append(heapq.heappop(candidates)[2])
+
+    if stats is not None:
+        stats.record(counters.expanded, counters.generated, counters.peak_frontier)
+    return paths
+
+
+def _add_candidate(candidates, found, counter, root, spur_path):
+    if spur_path is None:
+        return
+    candidate = root + spur_path
+    if tuple(candidate) not in found:
+        found.add(tuple(candidate))
+        heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+
+def _spur_search(graph, source, target, movie_allowed, person_allowed, counters,
+                 excluded_people=(), excluded_movies=(), banned_movies=(),
+                 first_movie=None, banned_stars=()):
+    """
+    BFS over the bipartite people/movies graph from source to target.
+
+    People in excluded_people and movies in excluded_movies are never used.
+    The first step out of source may not use a movie in banned_movies; if
+    first_movie is given the first step must use it and may not reach a star
+    in banned_stars.
+    """
+    if source == target:
+        return [] if first_movie is None else None
+
+    # person_parents[person] = (parent person, movie); each movie is expanded once
+    person_parents = {source: None}
+    blocked = set(excluded_people)
+    seen_movies = set(excluded_movies)
+    path = None
+
+    def allowed(movie):
+        if movie in seen_movies:
+            return False
+        seen_movies.add(movie)
+        return movie_allowed is None or movie_allowed(movie)
+
+    # the first level is restricted by the deviation being searched
+    if first_movie is not None:
+        first_steps = [(first_movie, banned_stars)] if allowed(first_movie) else []
+    else:
+        first_steps = [(movie, ()) for movie in graph.movies_of(source)
+                       if movie not in banned_movies and allowed(movie)]
+    counters.expanded += 1
+
+    frontier = []
+    for movie, skip in first_steps:
+        stars = graph.stars_of(movie)
+        counters.generated += len(stars)
+        for star in stars:
+            if star in person_parents or star in blocked or star in skip:
+                continue
+            if person_allowed is not None and not person_allowed(star):
+                blocked.add(star)
+                continue
+            person_parents[star] = (source, movie)
+            if star == target:
+                return trace(person_parents, target)
+            frontier.append(star)
+
+    while frontier and path is None:
+        counters.record(0, 0, len(frontier))
+        next_frontier = []
+        for person in frontier:
+            counters.expanded += 1
+            for movie in graph.movies_of(person):
+                if not allowed(movie):
+                    continue
+                stars = graph.stars_of(movie)
+                counters.generated += len(stars)
+                for star in stars:
+                    if star in person_parents or star in blocked:
+                        continue
+                    if person_allowed is not None and not person_allowed(star):
+                        blocked.add(star)
+                        continue
+                    person_parents[star] = (person, movie)
+                    if star == target:
+                        path = trace(person_parents, target)
+                        break
+                    next_frontier.append(star)
+                if path is not None:
+                    break
+            if path is not None:
+                break
+        frontier = next_frontier
+    return path
+
+
+def trace(parents, person):
+    """
+    Walks a parents map back from person and returns the path
+    as (movie, person) pairs in root-to-person order.
+    """
+    path = []
+    while parents[person] is not None:
+        parent, movie = parents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+    return path
+
+
+def _join(forward_parents, backward_parents, left, movie, right):
+    """
+    Joins the forward chain ending at left, the (left, right) edge through
+    movie and the backward chain starting at right into a single path.
+    """
+    path = trace(forward_parents, left)
+    path.append((movie, right))
+    person = right
+    while backward_parents[person] is not None:
+        parent, movie = backward_parents[person]
+        path.append((movie, parent))
+        person = parent
+    return path
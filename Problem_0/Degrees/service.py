@@ -0,0 +1,228 @@
+"""
+Batch and server modes for Degrees
+
+Both modes load the dataset once and keep it resident, answering many
+(source, target) queries with degrees.shortest_path.
+
+Usage: python service.py [directory] --batch FILE [--workers N]
+       python service.py [directory] --serve PORT
+
+Batch input has one query per line, either as JSON ({"source": ..., "target": ...})
+or as two names separated by a tab. "-" reads from stdin. Answers are written
+to stdout as JSON lines, in input order. With --workers N the batch is
+fanned out over N forked processes that share the loaded graph copy-on-write.
+
+The server answers GET /path?source=NAME&target=NAME with the same JSON object.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+def resolve(name):
+    """
+    Returns (person_id, error) for a name or IMDB id without prompting.
+    Ambiguous names are reported as an error listing the candidate ids.
+    """
+    if name in degrees.people:
+        return name, None
+    person_ids = degrees.person_ids_for_name(name)
+    if len(person_ids) == 0:
+        return None, f"Person not found: {name}"
+    if len(person_ids) > 1:
+        return None, f"Ambiguous name: {name} ({', '.join(person_ids)})"
+    return person_ids[0], None
+
+
+def answer(source_name, target_name, bidirectional=False):
+    """
+    Returns the JSON-serialisable answer for a single query.
+    """
+    response = {"source": source_name, "target": target_name}
+
+    source, error = resolve(source_name)
+    if error is None:
+        target, error = resolve(target_name)
+    if error is not None:
+        response["error"] = error
+        return response
+
+    response.update(solve(source, target, bidirectional))
+    return response
+
+
+def solve(source, target, bidirectional=False):
+    """
+    Returns the degrees and path fields of an answer for two person ids.
+    """
+    path = degrees.shortest_path(source, target, bidirectional=bidirectional)
+    if path is None:
+        return {"degrees": None, "path": None}
+    return {"degrees": len(path), "path": describe(source, path)}
+
+
+def describe(source, path):
+    """
+    Expands a (movie_id, person_id) path into one step per co-star pair.
+    """
+    steps = []
+    previous = source
+    for movie_id, person_id in path:
+        steps.append({
+            "person1": degrees.people[previous]["name"],
+            "person2": degrees.people[person_id]["name"],
+            "movie": degrees.movies[movie_id]["title"],
+            "movie_id": movie_id,
+            "person_id": person_id
+        })
+        previous = person_id
+    return steps
+
+
+def parse_query(line):
+    """
+    Parses a batch input line into (source, target).
+    Raises ValueError or KeyError if the line is malformed.
+    """
+    line = line.strip()
+    if line.startswith("{"):
+        query = json.loads(line)
+        source, target = query["source"], query["target"]
+        if not isinstance(source, str) or not isinstance(target, str):
+            raise ValueError("source and target must be strings")
+        return source, target
+    source, target = line.split("\t")
+    return source, target
+
+
+def read_queries(lines):
+    """
+    Yields (source, target, error) for each non-blank input line.
+    """
+    for number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            source, target = parse_query(line)
+        except (ValueError, KeyError):
+            yield None, None, f"Malformed query on line {number}"
+        else:
+            yield source, target, None
+
+
+def answer_all(queries, bidirectional=False, workers=1, chunksize=64):
+    """
+    Yields the answer for every (source, target, error) query, in input order.
+
+    With workers > 1 the queries are answered by a pool of forked processes.
+    The workers inherit the loaded dataset copy-on-write instead of receiving
+    it by pickling, so the data must be loaded before calling this. The
+    compact backend is preferred here, as its CSR arrays are never written
+    to and stay shared, while reference counting on the dict backend's
+    objects gradually copies pages into each worker.
+    """
+    jobs = ((source, target, error, bidirectional) for source, target, error in queries)
+    if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+        yield from map(_answer_job, jobs)
+        return
+
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        yield from pool.imap(_answer_job, jobs, chunksize=chunksize)
+
+
+def _answer_job(job):
+    source, target, error, bidirectional = job
+    if error is not None:
+        return {"error": error}
+    return answer(source, target, bidirectional)
+
+
+def run_batch(lines, out, bidirectional=False, workers=1):
+    """
+    Answers every query in lines, writing one JSON object per line to out.
+    """
+    for response in answer_all(read_queries(lines), bidirectional, workers):
+        out.write(json.dumps(response) + "\n")
+        out.flush()
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    bidirectional = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path != "/path":
+            self.send_json(404, {"error": "Not found"})
+            return
+
+        query = parse_qs(url.query)
+        if "source" not in query or "target" not in query:
+            self.send_json(400, {"error": "source and target are required"})
+            return
+
+        response = answer(query["source"][0], query["target"][0], self.bidirectional)
+        self.send_json(200, response)
+
+    def send_json(self, status, body):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+
+def serve(host, port, bidirectional=False):
+    """
+    Serves queries over HTTP until interrupted.
+    """
+    QueryHandler.bidirectional = bidirectional
+    server = ThreadingHTTPServer((host, port), QueryHandler)
+    print(f"Serving on http://{host}:{server.server_address[1]}/path")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(usage="python service.py [directory] (--batch FILE [--workers N] | --serve PORT)")
+    parser.add_argument("directory", nargs="?", default="large")
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument("--batch", metavar="FILE", help="answer queries from FILE, or - for stdin")
+    mode.add_argument("--serve", metavar="PORT", type=int, help="serve queries over HTTP on PORT")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of processes answering batch queries (0 for one per core)")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph as integer-indexed CSR arrays")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both ends of the path")
+    args = parser.parse_args()
+
+    # Load data from files into memory
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact)
+    print("Data loaded.", file=sys.stderr)
+
+    workers = args.workers or os.cpu_count()
+    if args.serve is not None:
+        serve(args.host, args.serve, args.bidirectional)
+    elif args.batch == "-":
+        run_batch(sys.stdin, sys.stdout, args.bidirectional, workers)
+    else:
+        with open(args.batch, encoding="utf-8") as f:
+            run_batch(f, sys.stdout, args.bidirectional, workers)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+Binary snapshot of a Degrees dataset
+
+A snapshot stores a CompactGraph's CSR arrays as raw int32 sections that are
+memory-mapped on load, followed by a pickled block with the person and movie
+records and the name index. It lives next to the CSV files and is only used
+while it is newer than all of them.
+
+Usage: python snapshot.py [directory]
+"""
+
+import mmap
+import os
+import pickle
+import struct
+import sys
+from array import array
+
+from graph import CompactGraph
+
+FILENAME = "degrees.snapshot"
+MAGIC = b"DEGSNAP\0"
+VERSION = 1
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# magic, version, int item size, person count, movie count,
+# len(person_movies), len(movie_stars), metadata offset, metadata length
+HEADER = struct.Struct("<8sIIQQQQQQ")
+
+
+def path_for(directory):
+    return os.path.join(directory, FILENAME)
+
+
+def is_fresh(directory):
+    """
+    Returns True if the directory has a snapshot newer than all of its CSV files.
+    """
+    try:
+        built = os.path.getmtime(path_for(directory))
+        return all(os.path.getmtime(os.path.join(directory, source)) <= built
+                   for source in SOURCES)
+    except OSError:
+        return False
+
+
+def write_snapshot(directory, graph, people, movies, names):
+    """
+    Writes graph (a CompactGraph) and the people, movies and names dicts
+    as a snapshot in directory.
+    """
+    # fold credits added by deltas into the CSR arrays first
+    if graph.extra_movies or graph.extra_stars:
+        graph.compact()
+
+    metadata = pickle.dumps((
+        [(people[person_id]["name"], people[person_id]["birth"]) for person_id in graph.person_ids],
+        [(movies[movie_id]["title"], movies[movie_id]["year"]) for movie_id in graph.movie_ids],
+        graph.person_ids,
+        graph.movie_ids,
+        names
+    ), protocol=pickle.HIGHEST_PROTOCOL)
+
+    sections = [array("i", section) for section in (
+        graph.person_offsets, graph.person_movies, graph.movie_offsets, graph.movie_stars
+    )]
+    metadata_offset = HEADER.size + sum(len(section) * section.itemsize for section in sections)
+
+    # write to a temporary file first so readers never see a partial snapshot
+    temporary = path_for(directory) + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(
+            MAGIC, VERSION, sections[0].itemsize,
+            graph.person_count(), graph.movie_count(),
+            len(graph.person_movies), len(graph.movie_stars),
+            metadata_offset, len(metadata)
+        ))
+        for section in sections:
+            section.tofile(f)
+        f.write(metadata)
+    os.replace(temporary, path_for(directory))
+
+
+def read_snapshot(directory):
+    """
+    Memory-maps the snapshot in directory.
+    Returns (graph, people, movies, names), or None if the snapshot is
+    missing, damaged or was written by an incompatible version.
+    """
+    try:
+        f = open(path_for(directory), "rb")
+    except OSError:
+        return None
+    with f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # an empty file cannot be mapped
+            return None
+
+    try:
+        return _read_sections(buffer)
+    except (ValueError, struct.error, pickle.UnpicklingError, EOFError, TypeError):
+        return None
+
+
+def _read_sections(buffer):
+    """
+    Returns (graph, people, movies, names) from a mapped snapshot, or None
+    if it was written by an incompatible version. Raises ValueError if its
+    size does not match the header.
+    """
+    (magic, version, itemsize, person_count, movie_count,
+     person_movies_count, movie_stars_count,
+     metadata_offset, metadata_length) = HEADER.unpack_from(buffer)
+    if magic != MAGIC or version != VERSION or itemsize != array("i").itemsize:
+        buffer.close()
+        return None
+
+    counts = (person_count + 1, person_movies_count, movie_count + 1, movie_stars_count)
+    if (HEADER.size + sum(counts) * itemsize != metadata_offset
+            or metadata_offset + metadata_length != len(buffer)):
+        raise ValueError("snapshot size does not match its header")
+
+    # CSR sections are used in place as int memoryviews over the mapping
+    graph = CompactGraph()
+    view = memoryview(buffer)
+    offset = HEADER.size
+    sections = []
+    for count in counts:
+        sections.append(view[offset:offset + count * itemsize].cast("i"))
+        offset += count * itemsize
+    graph.person_offsets, graph.person_movies, graph.movie_offsets, graph.movie_stars = sections
+
+    person_records, movie_records, graph.person_ids, graph.movie_ids, names = pickle.loads(
+        view[metadata_offset:metadata_offset + metadata_length]
+    )
+    graph.person_index = {person_id: i for i, person_id in enumerate(graph.person_ids)}
+    graph.movie_index = {movie_id: i for i, movie_id in enumerate(graph.movie_ids)}
+
+    people = {person_id: {"name": name, "birth": birth}
+              for person_id, (name, birth) in zip(graph.person_ids, person_records)}
+    movies = {movie_id: {"title": title, "year": year}
+              for movie_id, (title, year) in zip(graph.movie_ids, movie_records)}
+    return graph, people, movies, names
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python snapshot.py [directory]")
+    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+
+    import degrees
+
+    print("Loading data...")
+    degrees.load_data(directory, compact=True, use_snapshot=False)
+    write_snapshot(directory, degrees.graph, degrees.people, degrees.movies, degrees.names)
+    print(f"Snapshot written to {path_for(directory)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Monte Carlo Tree Search player for Tic Tac Toe
+
+An anytime alternative to minimax: UCT grows a search tree one random playout
+at a time, within an iteration or time budget, and plays the most visited move.
+It only uses player, actions, result, terminal and utility, so it runs on the
+tictactoe module or on any object with the same functions, such as an
+mnk.MNKGame whose boards are too large to search exhaustively.
+
+With workers > 1 every process grows its own tree with a different seed
+(root parallelization) and the visit counts of the root moves are summed.
+"""
+
+import math
+import multiprocessing
+import random
+import time
+
+import tictactoe as ttt
+
+EXPLORATION = math.sqrt(2)
+
+
+class Node():
+
+    def __init__(self, game, state, parent=None, action=None):
+        self.state = state
+        self.parent = parent
+        self.action = action
+        self.children = []
+        self.untried = [] if game.terminal(state) else list(game.actions(state))
+
+        # player who made the move leading here, credited with this node's wins
+        self.mover = None if parent is None else game.player(parent.state)
+        self.visits = 0
+        self.wins = 0.0
+
+    def select_child(self, exploration):
+        """
+        Returns the child with the highest upper confidence bound (UCB1).
+        """
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+        ))
+
+
+def search(board, iterations=None, time_limit=None, exploration=EXPLORATION, seed=None, game=None):
+    """
+    Runs UCT from the board until iterations playouts were made or time_limit
+    seconds passed, whichever comes first (at least one must be given).
+    Returns a dict of action -> (visits, wins) for the moves from the board.
+    """
+    if iterations is None and time_limit is None:
+        raise ValueError("iterations or time_limit must be given")
+    if game is None:
+        game = ttt
+        if not isinstance(board, ttt.Bitboard):
+            board = ttt.to_bitboard(board)
+
+    rng = random.Random(seed)
+    root = Node(game, board)
+    deadline = None if time_limit is None else time.perf_counter() + time_limit
+    playouts = 0
+    while iterations is None or playouts < iterations:
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+        playouts += 1
+
+        # selection: descend through fully expanded nodes
+        node = root
+        while not node.untried and node.children:
+            node = node.select_child(exploration)
+
+        # expansion: add one untried move
+        if node.untried:
+            action = node.untried.pop(rng.randrange(len(node.untried)))
+            child = Node(game, game.result(node.state, action), node, action)
+            node.children.append(child)
+            node = child
+
+        # simulation: play random moves to the end
+        state = node.state
+        while not game.terminal(state):
+            state = game.result(state, rng.choice(tuple(game.actions(state))))
+        outcome = game.utility(state)
+
+        # backpropagation: 1 for a win, 0.5 for a draw, from the mover's side
+        while node is not None:
+            node.visits += 1
+            if outcome == 0:
+                node.wins += 0.5
+            elif (outcome == 1) == (node.mover == ttt.X):
+                node.wins += 1
+            node = node.parent
+
+    return {child.action: (child.visits, child.wins) for child in root.children}
+
+
+def _search_job(job):
+    return search(*job)
+
+
+def best_action(board, iterations=None, time_limit=None, workers=1, exploration=EXPLORATION,
+                seed=None, game=None):
+    """
+    Returns the most visited action from the board after searching with
+    UCT, or None if the game is over. With workers > 1 the iterations are
+    split over that many processes, each searching for up to time_limit.
+    """
+    if (game or ttt).terminal(board):
+        return None
+    if workers <= 1:
+        statistics = search(board, iterations, time_limit, exploration, seed, game)
+    else:
+        seeds = random.Random(seed).sample(range(1 << 30), workers)
+        share = None if iterations is None else max(1, iterations // workers)
+        jobs = [(board, share, time_limit, exploration, job_seed, game) for job_seed in seeds]
+        statistics = {}
+        with multiprocessing.Pool(workers) as pool:
+            for result in pool.map(_search_job, jobs):
+                for action, (visits, wins) in result.items():
+                    total_visits, total_wins = statistics.get(action, (0, 0.0))
+                    statistics[action] = (total_visits + visits, total_wins + wins)
+
+    if not statistics:
+        # the budget ran out before a single playout
+        return next(iter((game or ttt).actions(board)))
+    return max(statistics, key=lambda action: statistics[action][0])
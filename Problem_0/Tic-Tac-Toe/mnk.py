@@ -0,0 +1,323 @@
+"""
+Generalized m,n,k game engine
+
+Tic Tac Toe on a rows x columns board where k in a row wins, e.g. 3,3,3 for
+Tic Tac Toe, 4,4,4 or 15,15,5 for gomoku. Positions record the winner as
+moves are made, by checking only the lines through the last move, and keep
+a heuristic score that is likewise updated from the lines through that move.
+
+best_move runs iterative-deepening alpha-beta (negamax) with a heuristic
+evaluation at the depth limit and returns the best move of the deepest
+completed iteration once the time budget runs out, so move latency stays
+bounded however large the board.
+"""
+
+import math
+import time
+from collections import namedtuple
+
+from tictactoe import X, O, EMPTY
+
+# cells is a flat tuple (row * columns + column), moves the number of moves
+# made and score the heuristic evaluation for X, kept up to date move by move
+Position = namedtuple("Position", ["cells", "winner", "moves", "score"])
+
+# Score of a won position, reduced by the number of plies needed to reach it
+WIN_SCORE = 10 ** 9
+
+DIRECTIONS = [(0, 1), (1, 0), (1, 1), (1, -1)]
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def window_score(xs, os):
+    """
+    Returns the heuristic value for X of a line of k cells: a line still
+    open to only one player counts 10 ** (its stones - 1) for that player.
+    """
+    if xs and not os:
+        return 10 ** (xs - 1)
+    if os and not xs:
+        return -(10 ** (os - 1))
+    return 0
+
+
+class MNKGame():
+
+    def __init__(self, rows=3, columns=3, k=3, radius=2):
+        if not (1 <= k <= max(rows, columns)):
+            raise ValueError("k must be between 1 and the longest side of the board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+
+        # moves are only considered within radius cells of an existing stone
+        self.radius = radius
+
+        # every line of k cells on the board, as tuples of flat indices
+        self.windows = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in DIRECTIONS:
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.windows.append(tuple(
+                            (i + di * step) * columns + (j + dj * step) for step in range(k)
+                        ))
+
+        # indices of the windows through each cell
+        self.cell_windows = [[] for _ in range(rows * columns)]
+        for index, window in enumerate(self.windows):
+            for cell in window:
+                self.cell_windows[cell].append(index)
+
+        # transposition table of the current search: cells -> (depth, value, flag, move)
+        self.table = {}
+        self.nodes = 0
+        self.depth_reached = 0
+        self.deadline = None
+
+    def initial_state(self):
+        """
+        Returns the empty board.
+        """
+        return Position((EMPTY,) * (self.rows * self.columns), None, 0, 0)
+
+    def player(self, state):
+        """
+        Returns player who has the next turn, or None if the game is over.
+        """
+        if self.terminal(state):
+            return None
+        return X if state.moves % 2 == 0 else O
+
+    def actions(self, state):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        if self.terminal(state):
+            return None
+        return {divmod(cell, self.columns) for cell, value in enumerate(state.cells) if value == EMPTY}
+
+    def result(self, state, action):
+        """
+        Returns the position that results from making move (i, j).
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.columns):
+            raise ValueError("Invalid action")
+        cell = i * self.columns + j
+        if state.cells[cell] != EMPTY:
+            raise Exception("Cell already occupied")
+        if self.terminal(state):
+            raise Exception("Game is over")
+
+        current = X if state.moves % 2 == 0 else O
+        cells = state.cells[:cell] + (current,) + state.cells[cell + 1:]
+        winner = current if self.completes_line(cells, i, j) else None
+
+        # only the windows through the new stone change their score
+        score = state.score
+        for index in self.cell_windows[cell]:
+            xs, os = self.count(state.cells, self.windows[index])
+            score -= window_score(xs, os)
+            if current == X:
+                score += window_score(xs + 1, os)
+            else:
+                score += window_score(xs, os + 1)
+        return Position(cells, winner, state.moves + 1, score)
+
+    def completes_line(self, cells, i, j):
+        """
+        Returns True if the stone at (i, j) is part of k in a row.
+        """
+        columns = self.columns
+        stone = cells[i * columns + j]
+        for di, dj in DIRECTIONS:
+            count = 1
+            for sign in (1, -1):
+                row, column = i + sign * di, j + sign * dj
+                while (0 <= row < self.rows and 0 <= column < columns
+                       and cells[row * columns + column] == stone):
+                    count += 1
+                    row, column = row + sign * di, column + sign * dj
+            if count >= self.k:
+                return True
+        return False
+
+    def winner(self, state):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        return state.winner
+
+    def terminal(self, state):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        return state.winner is not None or state.moves == len(state.cells)
+
+    def utility(self, state):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        if state.winner == X:
+            return 1
+        if state.winner == O:
+            return -1
+        return 0
+
+    def to_board(self, state):
+        """
+        Returns the list-of-lists board of a position.
+        """
+        return [list(state.cells[i * self.columns:(i + 1) * self.columns]) for i in range(self.rows)]
+
+    def from_board(self, board):
+        """
+        Returns the position of a list-of-lists board, which must be
+        reachable without a winner before its last move.
+        """
+        cells = tuple(cell for row in board for cell in row)
+        winner = None
+        for window in self.windows:
+            stone = cells[window[0]]
+            if stone != EMPTY and all(cells[cell] == stone for cell in window):
+                winner = stone
+                break
+        score = sum(window_score(*self.count(cells, window)) for window in self.windows)
+        return Position(cells, winner, sum(cell != EMPTY for cell in cells), score)
+
+    def count(self, cells, window):
+        """
+        Returns the number of X and O stones in a window.
+        """
+        xs = os = 0
+        for cell in window:
+            stone = cells[cell]
+            if stone == X:
+                xs += 1
+            elif stone == O:
+                os += 1
+        return xs, os
+
+    def evaluate(self, state):
+        """
+        Returns the heuristic score of a non-terminal position for X.
+        """
+        return state.score
+
+    def candidate_moves(self, state):
+        """
+        Returns the empty cells worth searching, as flat indices: those within
+        radius of a stone, ordered by distance to the centre of the board.
+        """
+        cells, columns = state.cells, self.columns
+        if state.moves == 0:
+            return [(self.rows // 2) * columns + columns // 2]
+
+        candidates = set()
+        for cell, stone in enumerate(cells):
+            if stone == EMPTY:
+                continue
+            i, j = divmod(cell, columns)
+            for row in range(max(0, i - self.radius), min(self.rows, i + self.radius + 1)):
+                for column in range(max(0, j - self.radius), min(columns, j + self.radius + 1)):
+                    if cells[row * columns + column] == EMPTY:
+                        candidates.add(row * columns + column)
+
+        centre_i, centre_j = (self.rows - 1) / 2, (columns - 1) / 2
+        return sorted(candidates, key=lambda cell: (
+            abs(cell // columns - centre_i) + abs(cell % columns - centre_j), cell
+        ))
+
+    def best_move(self, state, time_limit=1.0, max_depth=None):
+        """
+        Returns the best action (i, j) for the player to move found by
+        iterative-deepening alpha-beta within time_limit seconds, searching
+        at most max_depth plies (default: the number of empty cells).
+        """
+        if self.terminal(state):
+            return None
+
+        empty = len(state.cells) - state.moves
+        max_depth = empty if max_depth is None else min(max_depth, empty)
+        self.table = {}
+        self.nodes = 0
+        self.depth_reached = 0
+        self.deadline = time.perf_counter() + time_limit
+
+        # always have an answer, even if the first iteration times out
+        best = self.candidate_moves(state)[0]
+        for depth in range(1, max_depth + 1):
+            try:
+                value, move = self.negamax(state, depth, -math.inf, math.inf, 0)
+            except SearchTimeout:
+                break
+            best = move
+            self.depth_reached = depth
+
+            # a forced win or loss cannot change with deeper search
+            if abs(value) >= WIN_SCORE - len(state.cells):
+                break
+        return divmod(best, self.columns)
+
+    def negamax(self, state, depth, alpha, beta, ply):
+        """
+        Returns (value, move) of a position from the perspective of the
+        player to move, searching depth plies with alpha-beta pruning.
+        """
+        self.nodes += 1
+        if self.nodes % 256 == 0 and time.perf_counter() > self.deadline:
+            raise SearchTimeout
+
+        sign = 1 if state.moves % 2 == 0 else -1
+        if state.winner is not None:
+            # the player who just moved has won
+            return -(WIN_SCORE - ply), None
+        if state.moves == len(state.cells):
+            return 0, None
+        if depth == 0:
+            return sign * self.evaluate(state), None
+
+        window_alpha = alpha
+        entry = self.table.get(state.cells)
+        first = None
+        if entry is not None:
+            entry_depth, entry_value, flag, first = entry
+            if entry_depth >= depth:
+                if flag == 0:
+                    return entry_value, first
+                if flag < 0:
+                    beta = min(beta, entry_value)
+                else:
+                    alpha = max(alpha, entry_value)
+                if alpha >= beta:
+                    return entry_value, first
+
+        moves = self.candidate_moves(state)
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+
+        best_value, best_move = -math.inf, moves[0]
+        for cell in moves:
+            child = self.result(state, divmod(cell, self.columns))
+            value = -self.negamax(child, depth - 1, -beta, -alpha, ply + 1)[0]
+            if value > best_value:
+                best_value, best_move = value, cell
+            alpha = max(alpha, value)
+            if alpha >= beta:
+                break
+
+        # flag: 0 exact, -1 upper bound (failed low), 1 lower bound (failed high)
+        if best_value <= window_alpha:
+            flag = -1
+        elif best_value >= beta:
+            flag = 1
+        else:
+            flag = 0
+        self.table[state.cells] = (depth, best_value, flag, best_move)
+        return best_value, best_move
@@ -1,7 +1,9 @@
 import pygame
 import sys
+import threading
 import time
 
+import solution
 import tictactoe as ttt
 
 pygame.init()
@@ -16,10 +18,52 @@ screen = pygame.display.set_mode(size)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 16)
+
+# Minimum time before the AI's move is shown, so it does not appear instantly
+ai_delay = 0.5
+
+clock = pygame.time.Clock()
+
+# Held while a move is computed, so a search left running for an abandoned
+# game finishes before the next one uses nodes_searched and the transposition table
+engine_lock = threading.Lock()
+
+
+def think(job):
+    """
+    Computes the AI's move for job["board"] in a background thread,
+    recording the move, thinking time, nodes searched and whether the move
+    came from the solution table in the job, unless the job was cancelled
+    meanwhile.
+    """
+    with engine_lock:
+        if job["cancelled"].is_set():
+            return
+        from_table = ttt.use_solution_table and solution.lookup(job["board"]) is not None
+        nodes = ttt.nodes_searched
+        started = time.perf_counter()
+        move = ttt.minimax(job["board"])
+        if job["cancelled"].is_set():
+            return
+        job["seconds"] = time.perf_counter() - started
+        job["nodes"] = ttt.nodes_searched - nodes
+        job["from_table"] = from_table
+    job["move"] = move
+    job["done"].set()
+
+
+def start_thinking(board):
+    job = {"board": board, "started": time.perf_counter(), "done": threading.Event(),
+           "cancelled": threading.Event()}
+    threading.Thread(target=think, args=(job,), daemon=True).start()
+    return job
+
 
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_job = None
+last_ai_move = None
 
 while True:
 
@@ -101,6 +145,8 @@ while True:
                 title = f"Game Over: {winner} wins."
         elif user == player:
             title = f"Play as {user}"
+        elif ai_job is not None:
+            title = f"Computer thinking... {time.perf_counter() - ai_job['started']:.1f} s"
         else:
             title = f"Computer thinking..."
         title = largeFont.render(title, True, white)
@@ -108,15 +154,28 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
-        if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+        # Show how long the AI took for its last move
+        if last_ai_move is not None:
+            if last_ai_move["from_table"]:
+                effort = "table lookup"
             else:
-                ai_turn = True
+                effort = f"{last_ai_move['nodes']} nodes"
+            stats = smallFont.render(
+                f"Last AI move: {last_ai_move['seconds'] * 1000:.1f} ms, {effort}",
+                True, white
+            )
+            statsRect = stats.get_rect()
+            statsRect.center = ((width / 2), 62)
+            screen.blit(stats, statsRect)
+
+        # Check for AI move, computed in the background so the window stays responsive
+        if user != player and not game_over:
+            if ai_job is None:
+                ai_job = start_thinking(board)
+            elif ai_job["done"].is_set() and time.perf_counter() - ai_job["started"] >= ai_delay:
+                board = ttt.result(board, ai_job["move"])
+                last_ai_move = ai_job
+                ai_job = None
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
@@ -127,20 +186,26 @@ while True:
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
-        if game_over:
-            againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
-            again = mediumFont.render("Play Again", True, black)
-            againRect = again.get_rect()
-            againRect.center = againButton.center
-            pygame.draw.rect(screen, white, againButton)
-            screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+        # Play Again once the game is over, or Reset to abandon it mid-game
+        againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
+        again = mediumFont.render("Play Again" if game_over else "Reset", True, black)
+        againRect = again.get_rect()
+        againRect.center = againButton.center
+        pygame.draw.rect(screen, white, againButton)
+        screen.blit(again, againRect)
+        click, _, _ = pygame.mouse.get_pressed()
+        if click == 1:
+            mouse = pygame.mouse.get_pos()
+            if againButton.collidepoint(mouse):
+                time.sleep(0.2)
+                user = None
+                board = ttt.initial_state()
+                last_ai_move = None
+
+    # a move still being computed for an abandoned game is discarded
+    if ai_job is not None and (user is None or ttt.terminal(board)):
+        ai_job["cancelled"].set()
+        ai_job = None
 
     pygame.display.flip()
+    clock.tick(60)
@@ -0,0 +1,157 @@
+"""
+Headless self-play for the Tic Tac Toe AI
+
+Plays many games between two players without pygame or any sleeps, across
+worker processes, and reports win and draw rates, the nodes searched per
+move (tictactoe.nodes_searched, or playouts for mcts) and per-move latency
+percentiles.
+
+Players:
+    table      minimax answering from the solution table
+    minimax    minimax searching live
+    alphabeta  minimax searching live with alpha-beta pruning
+    mcts       Monte Carlo Tree Search with MCTS_ITERATIONS playouts per move
+    random     a uniformly random legal move
+
+Usage: python selfplay.py [--match X:O] [--games N] [--workers N] [--seed N] [--cold]
+"""
+
+import argparse
+import multiprocessing
+import os
+import random
+import statistics
+import time
+
+import mcts
+import tictactoe as ttt
+
+PLAYERS = ("table", "minimax", "alphabeta", "mcts", "random")
+
+MCTS_ITERATIONS = 2000
+
+DEFAULT_MATCHES = ["alphabeta:alphabeta", "alphabeta:random", "random:alphabeta", "random:random"]
+
+
+def choose(name, board, rng):
+    """
+    Returns (action, work) for the action the named player picks on the
+    board, with work the nodes searched by minimax or the playouts made
+    by mcts (0 for random). The caller's tictactoe.use_solution_table
+    setting is left unchanged.
+    """
+    if name == "random":
+        return rng.choice(sorted(ttt.actions(board))), 0
+    if name == "mcts":
+        statistics = mcts.search(board, iterations=MCTS_ITERATIONS, seed=rng.randrange(1 << 30))
+        action = max(statistics, key=lambda action: statistics[action][0])
+        return action, sum(visits for visits, _ in statistics.values())
+
+    use_solution_table = ttt.use_solution_table
+    ttt.use_solution_table = name == "table"
+    nodes = ttt.nodes_searched
+    try:
+        action = ttt.minimax(board, alphabeta=name == "alphabeta")
+    finally:
+        ttt.use_solution_table = use_solution_table
+    return action, ttt.nodes_searched - nodes
+
+
+def play_game(x_player, o_player, seed, cold=False):
+    """
+    Plays one game on a Bitboard.
+    Returns (winner, moves), with moves a list of (player name, seconds, work)
+    and work as returned by choose.
+    With cold=True the transposition table is cleared before every move.
+    """
+    rng = random.Random(seed)
+    board = ttt.Bitboard(0, 0)
+    moves = []
+    while not ttt.terminal(board):
+        name = x_player if ttt.player(board) == ttt.X else o_player
+        if cold:
+            ttt.clear_transposition_table()
+        started = time.perf_counter()
+        action, work = choose(name, board, rng)
+        moves.append((name, time.perf_counter() - started, work))
+        board = ttt.result(board, action)
+    return ttt.winner(board), moves
+
+
+def _play_job(job):
+    return play_game(*job)
+
+
+def play_games(x_player, o_player, games, seed=0, cold=False, workers=1, chunksize=16):
+    """
+    Yields the play_game result of every game of a match, in order.
+    With workers > 1 the games are played by a pool of processes.
+    """
+    jobs = [(x_player, o_player, seed + game, cold) for game in range(games)]
+    if workers <= 1:
+        yield from map(_play_job, jobs)
+        return
+
+    with multiprocessing.Pool(workers) as pool:
+        yield from pool.imap(_play_job, jobs, chunksize=chunksize)
+
+
+def percentile(values, fraction):
+    """
+    Returns the nearest-rank percentile of a sorted list.
+    """
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(x_player, o_player, results):
+    games = len(results)
+    winners = [winner for winner, _ in results]
+    print(f"{x_player} (X) vs {o_player} (O): {games} games,"
+          f" X wins {winners.count(ttt.X) / games:.1%},"
+          f" O wins {winners.count(ttt.O) / games:.1%},"
+          f" draws {winners.count(None) / games:.1%}")
+
+    for name in dict.fromkeys((x_player, o_player)):
+        moves = [move for _, game in results for move in game if move[0] == name]
+        if not moves or name == "random":
+            continue
+        times = sorted(seconds * 1000 for _, seconds, _ in moves)
+        work = [searched for _, _, searched in moves]
+        unit = "playouts" if name == "mcts" else "nodes"
+        print(f"  {name:<10} {len(moves)} moves"
+              f"  {unit:>8} mean {statistics.mean(work):9.1f} max {max(work):7}"
+              f"  latency p50 {percentile(times, 0.5):7.3f} ms"
+              f"  p90 {percentile(times, 0.9):7.3f} ms"
+              f"  p99 {percentile(times, 0.99):7.3f} ms"
+              f"  max {times[-1]:7.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python selfplay.py [--match X:O] [--games N] [--workers N] [--seed N] [--cold]"
+    )
+    parser.add_argument("--match", action="append", metavar="X:O",
+                        help=f"players for X and O, from {', '.join(PLAYERS)} (repeatable)")
+    parser.add_argument("--games", type=int, default=1000, help="games per match")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="number of processes playing games (0 for one per core)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--cold", action="store_true",
+                        help="clear the transposition table before every move")
+    args = parser.parse_args()
+
+    matches = []
+    for match in args.match or DEFAULT_MATCHES:
+        players = match.split(":")
+        if len(players) != 2 or any(name not in PLAYERS for name in players):
+            parser.error(f"invalid match {match!r}, expected X:O with players from {', '.join(PLAYERS)}")
+        matches.append(players)
+
+    workers = args.workers or os.cpu_count()
+    for x_player, o_player in matches:
+        results = list(play_games(x_player, o_player, args.games, args.seed, args.cold, workers))
+        report(x_player, o_player, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+"""
+Perfect-play solution table for Tic Tac Toe
+
+Tic Tac Toe has 5,478 positions reachable from the empty board, so the whole
+game is solved once and stored as a binary table. Every position is one
+unsigned 32-bit record, key << 11 | (value + 1) << 9 | best moves, where key
+is the packed Bitboard x | o << 9, value is the minimax value for X and bit
+i * 3 + j of best moves is set for every optimal action (i, j). Records are
+sorted by key.
+
+minimax answers from this table when tictactoe.use_solution_table is set,
+loading it on first use and generating it if the file is missing.
+
+Usage: python solution.py [build | verify]
+"""
+
+import os
+import struct
+import sys
+from array import array
+
+import tictactoe as ttt
+
+FILENAME = os.path.join(os.path.dirname(os.path.abspath(__file__)), "solution.bin")
+MAGIC = b"TTTSOLN\0"
+VERSION = 1
+
+# magic, version, record item size, record count
+HEADER = struct.Struct("<8sIII")
+
+KEY_SHIFT = 11
+VALUE_SHIFT = 9
+MOVES_MASK = (1 << 9) - 1
+
+# Loaded table: packed Bitboard -> record
+table = None
+
+
+def solve():
+    """
+    Returns the records of every position reachable from the empty board,
+    sorted by key.
+    """
+    records = {}
+
+    def visit(bits):
+        packed = bits.x | bits.o << 9
+        if packed in records:
+            return (records[packed] >> VALUE_SHIFT & 0b11) - 1
+
+        if ttt.terminal(bits):
+            value, moves = ttt.utility(bits), 0
+        else:
+            values = {action: visit(ttt.result(bits, action)) for action in ttt.actions(bits)}
+            best = max if ttt.player(bits) == ttt.X else min
+            value = best(values.values())
+            moves = sum(1 << (i * 3 + j) for (i, j), child in values.items() if child == value)
+
+        records[packed] = packed << KEY_SHIFT | (value + 1) << VALUE_SHIFT | moves
+        return value
+
+    visit(ttt.Bitboard(0, 0))
+    return array("I", sorted(records.values()))
+
+
+def write_table(records, filename=FILENAME):
+    # write to a temporary file first so readers never see a partial table
+    temporary = filename + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, records.itemsize, len(records)))
+        records.tofile(f)
+    os.replace(temporary, filename)
+
+
+def read_table(filename=FILENAME):
+    """
+    Returns the records of a table file, or None if it is missing
+    or was written by an incompatible version.
+    """
+    try:
+        f = open(filename, "rb")
+    except OSError:
+        return None
+    with f:
+        header = f.read(HEADER.size)
+        if len(header) != HEADER.size:
+            return None
+        magic, version, itemsize, count = HEADER.unpack(header)
+        records = array("I")
+        if magic != MAGIC or version != VERSION or itemsize != records.itemsize:
+            return None
+        try:
+            records.fromfile(f, count)
+        except EOFError:
+            return None
+    return records
+
+
+def load():
+    """
+    Returns the table as a dict of packed Bitboard -> record, reading it
+    from FILENAME, or solving the game and saving it there if needed.
+    """
+    global table
+    if table is None:
+        records = read_table()
+        if records is None:
+            records = solve()
+            try:
+                write_table(records)
+            except OSError:
+                pass
+        table = {record >> KEY_SHIFT: record for record in records}
+    return table
+
+
+def lookup(board):
+    """
+    Returns (value, best actions) for a board from the table, with the best
+    actions listed in tictactoe.MOVE_ORDER, or None for unreachable boards.
+    """
+    if not isinstance(board, ttt.Bitboard):
+        board = ttt.to_bitboard(board)
+    record = load().get(board.x | board.o << 9)
+    if record is None:
+        return None
+    moves = record & MOVES_MASK
+    value = (record >> VALUE_SHIFT & 0b11) - 1
+    return value, [(i, j) for i, j in ttt.MOVE_ORDER if moves & (1 << (i * 3 + j))]
+
+
+def verify():
+    """
+    Checks every position in the table against the live minimax search.
+    Returns the number of mismatches.
+    """
+    use_solution_table = ttt.use_solution_table
+    ttt.use_solution_table = False
+    mismatches = 0
+    try:
+        for packed in sorted(load()):
+            bits = ttt.Bitboard(packed & ttt.FULL_MASK, packed >> 9)
+            value, best = lookup(bits)
+
+            if ttt.terminal(bits):
+                expected, optimal = ttt.utility(bits), []
+            else:
+                search = ttt.min_value if ttt.player(bits) == ttt.X else ttt.max_value
+                values = {action: search(ttt.result(bits, action)) for action in ttt.actions(bits)}
+                expected = (max if ttt.player(bits) == ttt.X else min)(values.values())
+                optimal = [action for action in ttt.MOVE_ORDER if values.get(action) == expected]
+
+            if value != expected or best != optimal or (best and best[0] != ttt.minimax(bits)):
+                mismatches += 1
+                print(f"Mismatch: {ttt.from_bitboard(bits)}: table {value} {best}, search {expected} {optimal}")
+    finally:
+        ttt.use_solution_table = use_solution_table
+    return mismatches
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) == 2 else None
+    if command not in ("build", "verify"):
+        sys.exit("Usage: python solution.py [build | verify]")
+
+    if command == "build":
+        records = solve()
+        write_table(records)
+        print(f"{len(records)} positions written to {FILENAME}.")
+        return
+
+    mismatches = verify()
+    print(f"{len(table)} positions checked, {mismatches} mismatches.")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -4,13 +4,47 @@ Tic Tac Toe Player
 
 import copy
 import math
-import random
+from collections import namedtuple
 
 X = "X"
 O = "O"
 EMPTY = None
 
 
+def symmetries():
+    """
+    Returns the flat cell orders (row * 3 + column) of the 8 rotations
+    and reflections of the board.
+    """
+    orders = []
+    order = list(range(9))
+    for _ in range(4):
+        # rotate by 90 degrees, then add the mirror image of the rotation
+        order = [order[(2 - j) * 3 + i] for i in range(3) for j in range(3)]
+        orders.append(order)
+        orders.append([order[i * 3 + (2 - j)] for i in range(3) for j in range(3)])
+    return orders
+
+
+SYMMETRIES = symmetries()
+
+# Minimax values of the positions searched so far, keyed by board_key.
+# Kept for the life of the process, so later moves and games reuse them.
+transposition_table = {}
+
+# Whether board_key folds the 8 symmetric variants of a board into one entry
+use_symmetry = True
+
+# Search order of the moves: centre, then corners, then edges
+MOVE_ORDER = [(1, 1), (0, 0), (0, 2), (2, 0), (2, 2), (0, 1), (1, 0), (1, 2), (2, 1)]
+
+# Whether minimax answers from the precomputed perfect-play table in solution.py
+use_solution_table = True
+
+# Number of positions visited by the value functions, for measuring search effort
+nodes_searched = 0
+
+
 def initial_state():
     """
     Returns starting state of the board.
@@ -24,6 +58,9 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
+    if isinstance(board, Bitboard):
+        return bitboard_player(board)
+
     XStepCount = OStepCount = EmptyCount = 0
 
     # game is over
@@ -54,6 +91,9 @@ def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
+    if isinstance(board, Bitboard):
+        return bitboard_actions(board)
+
     possibleActions = set()
 
     # game is over
@@ -73,6 +113,9 @@ def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
+    if isinstance(board, Bitboard):
+        return bitboard_result(board, action)
+
     currentPlayer = player(board)
     boardClone = copy.deepcopy(board)
 
@@ -96,6 +139,9 @@ def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
+    if isinstance(board, Bitboard):
+        return bitboard_winner(board)
+
     for i in range(0, len(board)):
         # check rows from top to bottom
         if (board[i][0] == board[i][1] == board[i][2]) and (board[i][0] != EMPTY):
@@ -120,6 +166,9 @@ def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
+    if isinstance(board, Bitboard):
+        return bitboard_terminal(board)
+
     roundResult = winner(board)
 
     # if there is a winner, return True
@@ -140,6 +189,9 @@ def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
+    if isinstance(board, Bitboard):
+        return bitboard_utility(board)
+
     winPlayer = winner(board)
 
     if winPlayer == X:
@@ -150,20 +202,32 @@ def utility(board):
         return 0
 
 
-def minimax(board):
+def minimax(board, alphabeta=False):
     """
     Returns the optimal action for the current player on the board.
     The minimax algorithm, max_value and min_value are based on the pseudocode in the lecture 0.
+
+    With alphabeta=True the children are searched with alpha-beta pruning
+    (alphabeta_max_value and alphabeta_min_value) instead.
+    Moves are tried centre first, then corners, then edges.
+
+    The search itself runs on the Bitboard form of the board.
+
+    With use_solution_table set, the answer is looked up in the solution
+    table instead, which picks the same move as the search.
     """
-    currentPlayer = player(board)
-    optimalAction = []
+    if not isinstance(board, Bitboard):
+        board = to_bitboard(board)
+
+    # every reachable board is in the solution table, terminal ones without actions
+    if use_solution_table:
+        import solution
+        entry = solution.lookup(board)
+        if entry is not None:
+            return entry[1][0] if entry[1] else None
 
-    # First round, return a random action as any cell is an acceptable solution
-    # If not, the "AI" could stick in an infinite loop as it's unable to find the best solution based on the empty board
-    # Therefore, this is the only way to get the game started when the starting player is the "AI"
-    if board == initial_state():
-        optimalAction = (random.randint(0, 2), random.randint(0, 2))
-        return optimalAction
+    currentPlayer = player(board)
+    optimalAction = None
 
     # game over
     if terminal(board):
@@ -173,12 +237,14 @@ def minimax(board):
     else:
         # player X's turn
         if currentPlayer == X:
-            possibleActions = actions(board)
             currentBestValue = -math.inf
 
-            for action in possibleActions:
+            for action in ordered_actions(board):
                 # get the value of the action, and what the outcome could be
-                value = min_value(result(board, action))
+                if alphabeta:
+                    value = alphabeta_min_value(result(board, action), currentBestValue, math.inf)
+                else:
+                    value = min_value(result(board, action))
                 # check if the value is better than the current best value
                 if value > currentBestValue:
                     currentBestValue = value
@@ -188,12 +254,14 @@ def minimax(board):
 
         # player O's turn
         else:
-            possibleActions = actions(board)
             currentBestValue = math.inf
 
-            for action in possibleActions:
+            for action in ordered_actions(board):
                 # get the value of the action, and what the outcome could be
-                value = max_value(result(board, action))
+                if alphabeta:
+                    value = alphabeta_max_value(result(board, action), -math.inf, currentBestValue)
+                else:
+                    value = max_value(result(board, action))
                 # check if the value is better than the current best value
                 if value < currentBestValue:
                     currentBestValue = value
@@ -202,35 +270,264 @@ def minimax(board):
             return optimalAction
 
 
+def ordered_actions(board):
+    """
+    Returns the possible actions on the board as a list in search order:
+    centre, then corners, then edges.
+    """
+    possibleActions = actions(board)
+    return [action for action in MOVE_ORDER if action in possibleActions]
+
+
 def max_value(board):
     """
     Returns the maximum possible value of the current board
     """
+    global nodes_searched
+    nodes_searched += 1
+
+    key = board_key(board)
+    if key in transposition_table:
+        return transposition_table[key]
+
     value = -math.inf
 
     # game is over
     if terminal(board):
-        return utility(board)
+        value = utility(board)
 
     # game is not over yet, find the best possible move for player X
     else:
         for action in actions(board):
             value = max(value, min_value(result(board, action)))
-        return value
+
+    transposition_table[key] = value
+    return value
 
 
 def min_value(board):
     """
     Returns the minimum possible value of the current board
     """
+    global nodes_searched
+    nodes_searched += 1
+
+    key = board_key(board)
+    if key in transposition_table:
+        return transposition_table[key]
+
     value = math.inf
 
     # game is over
     if terminal(board):
-        return utility(board)
+        value = utility(board)
 
     # game is not over yet, find the best possible move for player O
     else:
         for action in actions(board):
             value = min(value, max_value(result(board, action)))
+
+    transposition_table[key] = value
+    return value
+
+
+def alphabeta_max_value(board, alpha, beta):
+    """
+    Returns the value of the current board for player X if it lies strictly
+    between alpha and beta, otherwise a bound beyond that side of the window
+    """
+    global nodes_searched
+    nodes_searched += 1
+
+    # exact values from earlier searches are reused
+    key = board_key(board)
+    if key in transposition_table:
+        return transposition_table[key]
+
+    # game is over
+    if terminal(board):
+        value = utility(board)
+        transposition_table[key] = value
         return value
+
+    # game is not over yet, stop as soon as player O would never allow this board
+    windowAlpha = alpha
+    value = -math.inf
+    for action in ordered_actions(board):
+        value = max(value, alphabeta_min_value(result(board, action), alpha, beta))
+        if value >= beta:
+            return value
+        alpha = max(alpha, value)
+
+    # a value at or below the original alpha is only an upper bound
+    if value > windowAlpha:
+        transposition_table[key] = value
+    return value
+
+
+def alphabeta_min_value(board, alpha, beta):
+    """
+    Returns the value of the current board for player O if it lies strictly
+    between alpha and beta, otherwise a bound beyond that side of the window
+    """
+    global nodes_searched
+    nodes_searched += 1
+
+    # exact values from earlier searches are reused
+    key = board_key(board)
+    if key in transposition_table:
+        return transposition_table[key]
+
+    # game is over
+    if terminal(board):
+        value = utility(board)
+        transposition_table[key] = value
+        return value
+
+    # game is not over yet, stop as soon as player X would never allow this board
+    windowBeta = beta
+    value = math.inf
+    for action in ordered_actions(board):
+        value = min(value, alphabeta_max_value(result(board, action), alpha, beta))
+        if value <= alpha:
+            return value
+        beta = min(beta, value)
+
+    # a value at or above the original beta is only a lower bound
+    if value < windowBeta:
+        transposition_table[key] = value
+    return value
+
+
+def board_key(board):
+    """
+    Returns the transposition table key of a board: its Bitboard masks
+    packed as x | o << 9, minimised over the board's rotations and
+    reflections when use_symmetry is set.
+    The player to move follows from the board, so it is not part of the key.
+    """
+    if not isinstance(board, Bitboard):
+        board = to_bitboard(board)
+    packed = board.x | board.o << 9
+    if not use_symmetry:
+        return packed
+
+    key = canonical_keys.get(packed)
+    if key is None:
+        key = canonical_keys[packed] = min(
+            mapping[board.x] | mapping[board.o] << 9 for mapping in SYMMETRY_MASKS
+        )
+    return key
+
+
+def clear_transposition_table():
+    """
+    Forgets every cached minimax value.
+    """
+    transposition_table.clear()
+
+
+# Bitboard representation
+#
+# A Bitboard holds one 9-bit mask per player, with bit i * 3 + j set when
+# that player occupies cell (i, j). The functions above accept either
+# representation; on Bitboards they dispatch to the bitboard_ functions
+# below, which work on masks and precomputed tables instead of scanning
+# and copying lists.
+
+Bitboard = namedtuple("Bitboard", ["x", "o"])
+
+FULL_MASK = (1 << 9) - 1
+
+# Rows, columns and diagonals as cell masks
+WIN_MASKS = (
+    [0b111 << (3 * i) for i in range(3)]
+    + [0b001001001 << j for j in range(3)]
+    + [0b100010001, 0b001010100]
+)
+
+# Per 9-bit mask: whether it contains a winning line, and how many cells it has
+WINNING = [any(mask & line == line for line in WIN_MASKS) for mask in range(1 << 9)]
+CELL_COUNT = [bin(mask).count("1") for mask in range(1 << 9)]
+
+# Per occupied-cells mask: the actions (i, j) still available
+OPEN_ACTIONS = [
+    frozenset((cell // 3, cell % 3) for cell in range(9) if not occupied & (1 << cell))
+    for occupied in range(1 << 9)
+]
+
+# Per symmetry: the image of every 9-bit mask under that rotation or reflection
+SYMMETRY_MASKS = [
+    [sum(1 << i for i, cell in enumerate(order) if mask & (1 << cell)) for mask in range(1 << 9)]
+    for order in SYMMETRIES
+]
+
+# Symmetry-reduced board_key of each packed board seen so far
+canonical_keys = {}
+
+
+def to_bitboard(board):
+    """
+    Returns the Bitboard of a list-of-lists board.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == X:
+                x |= 1 << (i * 3 + j)
+            elif cell == O:
+                o |= 1 << (i * 3 + j)
+    return Bitboard(x, o)
+
+
+def from_bitboard(bits):
+    """
+    Returns the list-of-lists board of a Bitboard.
+    """
+    return [[X if bits.x & (1 << (i * 3 + j)) else O if bits.o & (1 << (i * 3 + j)) else EMPTY
+             for j in range(3)]
+            for i in range(3)]
+
+
+def bitboard_player(bits):
+    if bitboard_terminal(bits):
+        return None
+    return X if CELL_COUNT[bits.x] <= CELL_COUNT[bits.o] else O
+
+
+def bitboard_actions(bits):
+    if bitboard_terminal(bits):
+        return None
+    return OPEN_ACTIONS[bits.x | bits.o]
+
+
+def bitboard_result(bits, action):
+    i, j = action
+    if not (0 <= i <= 2 and 0 <= j <= 2):
+        raise ValueError("Invalid action")
+    cell = 1 << (i * 3 + j)
+    if (bits.x | bits.o) & cell:
+        raise Exception("Cell already occupied")
+    if CELL_COUNT[bits.x] <= CELL_COUNT[bits.o]:
+        return Bitboard(bits.x | cell, bits.o)
+    return Bitboard(bits.x, bits.o | cell)
+
+
+def bitboard_winner(bits):
+    if WINNING[bits.x]:
+        return X
+    if WINNING[bits.o]:
+        return O
+    return None
+
+
+def bitboard_terminal(bits):
+    return WINNING[bits.x] or WINNING[bits.o] or (bits.x | bits.o) == FULL_MASK
+
+
+def bitboard_utility(bits):
+    if WINNING[bits.x]:
+        return 1
+    if WINNING[bits.o]:
+        return -1
+    return 0
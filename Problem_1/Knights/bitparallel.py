@@ -0,0 +1,94 @@
+"""
+Bit-parallel evaluation of logic sentences
+
+A sentence is compiled into a Python function over integer bitmasks, where
+bit i of a symbol's mask is its value in model i. One call then evaluates the
+sentence in every model of a block at once: Not becomes xor with the mask of
+all models, And becomes &, Or becomes |, and shared subsentences are computed
+once. model_check uses this to test 2 ** BLOCK_BITS models per call rather
+than walking the sentence tree once per model.
+"""
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+# log2 of the number of models evaluated together
+BLOCK_BITS = 16
+
+
+def truth_columns(count):
+    """
+    Returns the bitmasks of the first count symbols over all 2 ** count
+    models, where model i gives symbol j the value of bit j of i.
+    """
+    size = 1 << count
+    columns = []
+    for j in range(count):
+        period = 2 << j
+        # 1 at the start of every period, then ones in the upper half of each period
+        starts = ((1 << size) - 1) // ((1 << period) - 1)
+        columns.append(starts * (((1 << (1 << j)) - 1) << (1 << j)))
+    return columns
+
+
+def compile_sentence(sentence, names):
+    """
+    Returns a function evaluate(columns, mask) for a sentence, taking the
+    bitmask of every symbol in names, in that order, and the mask of all
+    models in the block, and returning the bitmask of the models in which
+    the sentence is true.
+    """
+    index = {name: i for i, name in enumerate(names)}
+    lines = []
+    temporaries = {}
+
+    def visit(node):
+        if node in temporaries:
+            return temporaries[node]
+        if isinstance(node, Symbol):
+            if node.name not in index:
+                raise Exception(f"variable {node.name} not in model")
+            expression = f"c[{index[node.name]}]"
+        elif isinstance(node, Not):
+            expression = f"m ^ {visit(node.operand)}"
+        elif isinstance(node, And):
+            expression = " & ".join([visit(conjunct) for conjunct in node.conjuncts]) or "m"
+        elif isinstance(node, Or):
+            expression = " | ".join([visit(disjunct) for disjunct in node.disjuncts]) or "0"
+        elif isinstance(node, Implication):
+            expression = f"(m ^ {visit(node.antecedent)}) | {visit(node.consequent)}"
+        elif isinstance(node, Biconditional):
+            expression = f"m ^ {visit(node.left)} ^ {visit(node.right)}"
+        else:
+            raise TypeError(f"cannot compile {type(node).__name__}")
+
+        name = f"t{len(lines)}"
+        lines.append(f"    {name} = {expression}")
+        temporaries[node] = name
+        return name
+
+    result = visit(sentence)
+    source = "def evaluate(c, m):\n" + "\n".join(lines) + f"\n    return {result}\n"
+    namespace = {}
+    exec(source, namespace)
+    return namespace["evaluate"]
+
+
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query, a block of models at a time."""
+
+    names = sorted(set.union(knowledge.symbols(), query.symbols()))
+    evaluate_knowledge = compile_sentence(knowledge, names)
+    evaluate_query = compile_sentence(query, names)
+
+    # the first symbols vary within a block, the rest are fixed per block
+    inner = min(len(names), BLOCK_BITS)
+    outer = len(names) - inner
+    mask = (1 << (1 << inner)) - 1
+    columns = truth_columns(inner)
+    for block in range(1 << outer):
+        block_columns = columns + [mask if block >> j & 1 else 0 for j in range(outer)]
+
+        # a model where knowledge is true and query false disproves entailment
+        if evaluate_knowledge(block_columns, mask) & ~evaluate_query(block_columns, mask):
+            return False
+    return True
@@ -0,0 +1,149 @@
+"""
+CNF conversion of logic sentences
+
+A CNF holds clauses over integer variables, numbered from 1, with a literal
+written +v or -v as in the DIMACS format. Symbols are interned to variables
+by name, and every other connective gets a fresh (Tseitin) variable defined
+by a few clauses, so the clauses grow linearly with the sentence instead of
+exponentially as with distributing Or over And.
+
+Clauses are stored back to back in one int array, clause i being
+literals[offsets[i]:offsets[i + 1]], so solvers and resolution can work on
+flat arrays rather than on Sentence objects.
+"""
+
+from array import array
+
+from logic import Symbol, Not, And, Or, Implication, Biconditional
+
+
+class CNF():
+
+    def __init__(self):
+        # symbol name -> variable, and variable -> symbol name (None for Tseitin variables)
+        self.variables = {}
+        self.names = [None]
+
+        self.literals = array("i")
+        self.offsets = array("i", [0])
+
+        # literal of every sentence encoded so far
+        self.encoded = {}
+
+    def variable_count(self):
+        return len(self.names) - 1
+
+    def clause_count(self):
+        return len(self.offsets) - 1
+
+    def clause(self, i):
+        """
+        Returns clause i as an array of literals.
+        """
+        return self.literals[self.offsets[i]:self.offsets[i + 1]]
+
+    def clauses(self, start=0):
+        """
+        Yields every clause from clause start on, as arrays of literals.
+        """
+        for i in range(start, self.clause_count()):
+            yield self.clause(i)
+
+    def new_variable(self, name=None):
+        self.names.append(name)
+        return len(self.names) - 1
+
+    def symbol(self, name):
+        """
+        Returns the variable of a symbol name, interning it on first use.
+        """
+        variable = self.variables.get(name)
+        if variable is None:
+            variable = self.variables[name] = self.new_variable(name)
+        return variable
+
+    def add_clause(self, literals):
+        self.literals.extend(literals)
+        self.offsets.append(len(self.literals))
+
+    def encode(self, sentence):
+        """
+        Returns the literal that is true exactly when the sentence is,
+        adding the clauses defining it.
+        """
+        if isinstance(sentence, Symbol):
+            return self.symbol(sentence.name)
+        if isinstance(sentence, Not):
+            return -self.encode(sentence.operand)
+        if sentence in self.encoded:
+            return self.encoded[sentence]
+
+        if isinstance(sentence, (And, Or)):
+            conjunction = isinstance(sentence, And)
+            operands = [self.encode(operand) for operand in
+                        (sentence.conjuncts if conjunction else sentence.disjuncts)]
+            if len(operands) == 1:
+                return operands[0]
+
+            # for Or, encode ¬(¬a ∧ ¬b ∧ ...)
+            sign = 1 if conjunction else -1
+            literal = self.new_variable()
+            for operand in operands:
+                self.add_clause([-literal, sign * operand])
+            self.add_clause([literal] + [-sign * operand for operand in operands])
+            literal *= sign
+        elif isinstance(sentence, Implication):
+            antecedent = self.encode(sentence.antecedent)
+            consequent = self.encode(sentence.consequent)
+            literal = self.new_variable()
+            self.add_clause([-literal, -antecedent, consequent])
+            self.add_clause([literal, antecedent])
+            self.add_clause([literal, -consequent])
+        elif isinstance(sentence, Biconditional):
+            left = self.encode(sentence.left)
+            right = self.encode(sentence.right)
+            literal = self.new_variable()
+            self.add_clause([-literal, -left, right])
+            self.add_clause([-literal, left, -right])
+            self.add_clause([literal, left, right])
+            self.add_clause([literal, -left, -right])
+        else:
+            raise TypeError(f"cannot convert {type(sentence).__name__} to CNF")
+
+        self.encoded[sentence] = literal
+        return literal
+
+    def add(self, sentence):
+        """
+        Adds clauses requiring the sentence to be true. The conjuncts of a
+        top-level And are added one by one, and a top-level Or of literals
+        becomes a single clause.
+        """
+        if isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        elif isinstance(sentence, Or):
+            self.add_clause([self.encode(disjunct) for disjunct in sentence.disjuncts])
+        else:
+            self.add_clause([self.encode(sentence)])
+
+    def to_dimacs(self):
+        """
+        Returns the clauses in DIMACS CNF format, with a comment line
+        naming the variable of every symbol.
+        """
+        lines = [f"c {variable} {name}" for name, variable in self.variables.items()]
+        lines.append(f"p cnf {self.variable_count()} {self.clause_count()}")
+        for clause in self.clauses():
+            lines.append(" ".join(map(str, clause)) + " 0")
+        return "\n".join(lines) + "\n"
+
+
+def to_cnf(*sentences):
+    """
+    Returns the CNF of the conjunction of the sentences.
+    """
+    formula = CNF()
+    for sentence in sentences:
+        formula.add(sentence)
+    return formula
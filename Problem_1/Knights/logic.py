@@ -1,8 +1,18 @@
 import itertools
+import weakref
 
 
 class Sentence():
 
+    # cached hash, set of symbol names and formula string
+    __slots__ = ("_hash", "_symbols", "_formula", "__weakref__")
+
+    # Weak references to the interned sentences by (class, operands...).
+    # Sentences other than And and Or are interned when created, so structurally
+    # equal ones are the same immutable object; operands are always stored as
+    # interned sentences.
+    interned = {}
+
     def evaluate(self, model):
         """Evaluates the logical sentence."""
         raise Exception("nothing to evaluate")
@@ -13,13 +23,41 @@ class Sentence():
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns a frozenset of all symbols in the logical sentence, cached."""
+        return frozenset()
+
+    def canonical(self):
+        """Returns the interned sentence structurally equal to this one."""
+        return self
 
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
             raise TypeError("must be a logical sentence")
 
+    @classmethod
+    def intern(cls, operands):
+        """
+        Returns (sentence, created): the interned sentence of class cls with
+        these interned operands, or if there was none a new one with no
+        attributes besides the caches, hashed like (cls, operands...).
+        """
+        key = (cls,) + operands
+        reference = Sentence.interned.get(key)
+        if reference is not None:
+            sentence = reference()
+            if sentence is not None:
+                return sentence, False
+        sentence = object.__new__(cls)
+        sentence._hash = hash(key)
+        sentence._symbols = None
+        sentence._formula = None
+        Sentence.interned[key] = weakref.KeyedRef(sentence, _release, key)
+        return sentence, True
+
     @classmethod
     def parenthesize(cls, s):
         """Parenthesizes an expression if not already parenthesized."""
@@ -42,16 +80,32 @@ class Sentence():
             return f"({s})"
 
 
+def _release(reference):
+    """Removes a sentence that no longer exists from the intern table."""
+    if Sentence.interned.get(reference.key) is reference:
+        del Sentence.interned[reference.key]
+
+
 class Symbol(Sentence):
 
-    def __init__(self, name):
-        self.name = name
+    __slots__ = ("name",)
+
+    def __new__(cls, name):
+        sentence, created = cls.intern((name,))
+        if created:
+            sentence.name = name
+            sentence._symbols = frozenset([name])
+            sentence._formula = name
+        return sentence
+
+    def __reduce__(self):
+        return (type(self), (self.name,))
 
     def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
+        return self is other or (isinstance(other, Symbol) and self.name == other.name)
 
     def __hash__(self):
-        return hash(("symbol", self.name))
+        return self._hash
 
     def __repr__(self):
         return self.name
@@ -65,20 +119,33 @@ class Symbol(Sentence):
     def formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def symbol_set(self):
+        return self._symbols
 
 
 class Not(Sentence):
-    def __init__(self, operand):
+
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
         Sentence.validate(operand)
-        self.operand = operand
+        operand = operand.canonical()
+        sentence, created = cls.intern((operand,))
+        if created:
+            sentence.operand = operand
+        return sentence
+
+    def __reduce__(self):
+        return (type(self), (self.operand,))
 
     def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+        return self is other or (
+            isinstance(other, Not) and hash(self) == hash(other)
+            and self.operand == other.operand
+        )
 
     def __hash__(self):
-        return hash(("not", hash(self.operand)))
+        return self._hash
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -87,25 +154,39 @@ class Not(Sentence):
         return not self.operand.evaluate(model)
 
     def formula(self):
-        return "¬" + Sentence.parenthesize(self.operand.formula())
+        if self._formula is None:
+            self._formula = "¬" + Sentence.parenthesize(self.operand.formula())
+        return self._formula
 
-    def symbols(self):
-        return self.operand.symbols()
+    def symbol_set(self):
+        return self.operand.symbol_set()
 
 
 class And(Sentence):
+
+    # frozen is True for the interned copy used as an operand, which add() refuses to change
+    __slots__ = ("conjuncts", "frozen")
+
     def __init__(self, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
+        self.conjuncts = [conjunct.canonical() for conjunct in conjuncts]
+        self.frozen = False
+        self.changed()
+
+    def __reduce__(self):
+        return (type(self), tuple(self.conjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
+        return self is other or (
+            isinstance(other, And) and hash(self) == hash(other)
+            and self.conjuncts == other.conjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash((type(self),) + tuple(self.conjuncts))
+        return self._hash
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -113,68 +194,131 @@ class And(Sentence):
         )
         return f"And({conjunctions})"
 
+    def changed(self):
+        """Forgets the cached hash, symbols and formula."""
+        self._hash = self._symbols = self._formula = None
+
     def add(self, conjunct):
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        if self.frozen:
+            raise TypeError("cannot add to an interned sentence")
+        self.conjuncts.append(conjunct.canonical())
+        self.changed()
+
+    def canonical(self):
+        if self.frozen:
+            return self
+        sentence, created = type(self).intern(tuple(self.conjuncts))
+        if created:
+            sentence.conjuncts = list(self.conjuncts)
+            sentence.frozen = True
+        return sentence
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
     def formula(self):
-        if len(self.conjuncts) == 1:
-            return self.conjuncts[0].formula()
-        return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
-                           for conjunct in self.conjuncts])
-
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+        if self._formula is None:
+            if len(self.conjuncts) == 1:
+                self._formula = self.conjuncts[0].formula()
+            else:
+                self._formula = " ∧ ".join([Sentence.parenthesize(conjunct.formula())
+                                            for conjunct in self.conjuncts])
+        return self._formula
+
+    def symbol_set(self):
+        if self._symbols is None:
+            self._symbols = frozenset().union(
+                *[conjunct.symbol_set() for conjunct in self.conjuncts]
+            )
+        return self._symbols
 
 
 class Or(Sentence):
+
+    # frozen is True for the interned copy used as an operand
+    __slots__ = ("disjuncts", "frozen")
+
     def __init__(self, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
+        self.disjuncts = [disjunct.canonical() for disjunct in disjuncts]
+        self.frozen = False
+        self._hash = self._symbols = self._formula = None
+
+    def __reduce__(self):
+        return (type(self), tuple(self.disjuncts))
 
     def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
+        return self is other or (
+            isinstance(other, Or) and hash(self) == hash(other)
+            and self.disjuncts == other.disjuncts
+        )
 
     def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        if self._hash is None:
+            self._hash = hash((type(self),) + tuple(self.disjuncts))
+        return self._hash
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
         return f"Or({disjuncts})"
 
+    def canonical(self):
+        if self.frozen:
+            return self
+        sentence, created = type(self).intern(tuple(self.disjuncts))
+        if created:
+            sentence.disjuncts = list(self.disjuncts)
+            sentence.frozen = True
+        return sentence
+
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
     def formula(self):
-        if len(self.disjuncts) == 1:
-            return self.disjuncts[0].formula()
-        return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
-                            for disjunct in self.disjuncts])
-
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+        if self._formula is None:
+            if len(self.disjuncts) == 1:
+                self._formula = self.disjuncts[0].formula()
+            else:
+                self._formula = " ∨  ".join([Sentence.parenthesize(disjunct.formula())
+                                             for disjunct in self.disjuncts])
+        return self._formula
+
+    def symbol_set(self):
+        if self._symbols is None:
+            self._symbols = frozenset().union(
+                *[disjunct.symbol_set() for disjunct in self.disjuncts]
+            )
+        return self._symbols
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
+        antecedent, consequent = antecedent.canonical(), consequent.canonical()
+        sentence, created = cls.intern((antecedent, consequent))
+        if created:
+            sentence.antecedent = antecedent
+            sentence.consequent = consequent
+        return sentence
+
+    def __reduce__(self):
+        return (type(self), (self.antecedent, self.consequent))
 
     def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
+        return self is other or (
+            isinstance(other, Implication) and hash(self) == hash(other)
+            and self.antecedent == other.antecedent
+            and self.consequent == other.consequent
+        )
 
     def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return self._hash
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -184,50 +328,83 @@ class Implication(Sentence):
                 or self.consequent.evaluate(model))
 
     def formula(self):
-        antecedent = Sentence.parenthesize(self.antecedent.formula())
-        consequent = Sentence.parenthesize(self.consequent.formula())
-        return f"{antecedent} => {consequent}"
+        if self._formula is None:
+            antecedent = Sentence.parenthesize(self.antecedent.formula())
+            consequent = Sentence.parenthesize(self.consequent.formula())
+            self._formula = f"{antecedent} => {consequent}"
+        return self._formula
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def symbol_set(self):
+        if self._symbols is None:
+            self._symbols = self.antecedent.symbol_set() | self.consequent.symbol_set()
+        return self._symbols
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
+        left, right = left.canonical(), right.canonical()
+        sentence, created = cls.intern((left, right))
+        if created:
+            sentence.left = left
+            sentence.right = right
+        return sentence
+
+    def __reduce__(self):
+        return (type(self), (self.left, self.right))
 
     def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
+        return self is other or (
+            isinstance(other, Biconditional) and hash(self) == hash(other)
+            and self.left == other.left
+            and self.right == other.right
+        )
 
     def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return self._hash
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
 
     def evaluate(self, model):
-        return ((self.left.evaluate(model)
-                 and self.right.evaluate(model))
-                or (not self.left.evaluate(model)
-                    and not self.right.evaluate(model)))
+        return self.left.evaluate(model) == self.right.evaluate(model)
 
     def formula(self):
-        left = Sentence.parenthesize(str(self.left))
-        right = Sentence.parenthesize(str(self.right))
-        return f"{left} <=> {right}"
+        if self._formula is None:
+            left = Sentence.parenthesize(str(self.left))
+            right = Sentence.parenthesize(str(self.right))
+            self._formula = f"{left} <=> {right}"
+        return self._formula
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
+    def symbol_set(self):
+        if self._symbols is None:
+            self._symbols = self.left.symbol_set() | self.right.symbol_set()
+        return self._symbols
+
+
+# Whether model_check decides entailment with the CDCL solver in sat.py
+# instead of enumerating every model
+use_sat_solver = True
+
+# Whether model enumeration evaluates blocks of models at once with the
+# compiled bitmask functions of bitparallel.py
+use_bit_parallel = True
 
 
 def model_check(knowledge, query):
     """Checks if knowledge base entails query."""
 
+    if use_sat_solver:
+        import sat
+        return sat.entails(knowledge, query)
+    if use_bit_parallel:
+        import bitparallel
+        return bitparallel.model_check(knowledge, query)
+
     def check_all(knowledge, query, symbols, model):
         """Checks if knowledge base entails query, given a particular model."""
 
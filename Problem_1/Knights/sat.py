@@ -0,0 +1,391 @@
+"""
+SAT-based entailment for logic sentences
+
+model_check enumerates all 2^n models. Here the knowledge base and the
+negated query are instead converted to CNF (see cnf.py) and handed to a CDCL
+solver: unit propagation with two watched literals per clause, conflict
+analysis learning a first-UIP clause, non-chronological backjumping and an
+activity-based (VSIDS) choice of decision variable with phase saving. The
+knowledge base entails the query exactly when KB ∧ ¬query is unsatisfiable.
+
+A KnowledgeBase keeps its solver between queries, for asking one knowledge
+base many questions.
+
+Variables are numbered from 1, and a literal is +v or -v.
+"""
+
+import heapq
+
+from cnf import CNF
+from logic import And
+
+TRUE = 1
+FALSE = -1
+UNASSIGNED = 0
+
+
+class Solver():
+
+    def __init__(self):
+        # per variable (index 0 unused): value, decision level, reason clause and activity
+        self.values = [UNASSIGNED]
+        self.levels = [0]
+        self.reasons = [None]
+        self.activity = [0.0]
+        self.phases = [FALSE]
+
+        self.clauses = []
+        self.watches = {}
+
+        # assigned literals in order, and where each decision level starts in it
+        self.trail = []
+        self.trail_limits = []
+        self.propagated = 0
+
+        # unassigned variables by activity, with stale entries skipped when popped
+        self.order = []
+        self.increment = 1.0
+
+        # False once the clauses are unsatisfiable without any assumptions
+        self.ok = True
+        self.model = None
+
+    def new_variable(self):
+        """
+        Adds a variable and returns its number.
+        """
+        self.values.append(UNASSIGNED)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.activity.append(0.0)
+        self.phases.append(FALSE)
+        variable = len(self.values) - 1
+        self.watches[variable] = []
+        self.watches[-variable] = []
+        heapq.heappush(self.order, (0.0, variable))
+        return variable
+
+    def variable_count(self):
+        return len(self.values) - 1
+
+    def value(self, literal):
+        value = self.values[abs(literal)]
+        return value if literal > 0 else -value
+
+    def add_clause(self, literals):
+        """
+        Adds a clause, a list of literals over existing variables.
+        Returns False if the clauses have become unsatisfiable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        clause = []
+        for literal in literals:
+            value = self.value(literal)
+            if value == TRUE or -literal in clause:
+                # already satisfied, or a tautology
+                return True
+            if value == UNASSIGNED and literal not in clause:
+                clause.append(literal)
+
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.attach(clause)
+        return self.ok
+
+    def load(self, formula, start=0):
+        """
+        Adds the variables of a CNF and its clauses from clause start on.
+        Returns the number of clauses in the CNF, where the next load of
+        the same, grown CNF should start.
+        """
+        while self.variable_count() < formula.variable_count():
+            self.new_variable()
+        for clause in formula.clauses(start):
+            self.add_clause(clause)
+        return formula.clause_count()
+
+    def attach(self, clause):
+        """
+        Stores a clause of two or more literals, watching its first two.
+        Returns its index.
+        """
+        self.clauses.append(clause)
+        index = len(self.clauses) - 1
+        self.watches[clause[0]].append(index)
+        self.watches[clause[1]].append(index)
+        return index
+
+    def assign(self, literal, reason):
+        variable = abs(literal)
+        self.values[variable] = TRUE if literal > 0 else FALSE
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(literal)
+
+    def propagate(self):
+        """
+        Assigns every literal implied by unit clauses.
+        Returns the index of a clause with all literals false, or None.
+        """
+        clauses, watches, values = self.clauses, self.watches, self.values
+        while self.propagated < len(self.trail):
+            false_literal = -self.trail[self.propagated]
+            self.propagated += 1
+
+            watching = watches[false_literal]
+            kept = []
+            for position, index in enumerate(watching):
+                clause = clauses[index]
+
+                # keep the literal that just became false in position 1
+                if clause[0] == false_literal:
+                    clause[0], clause[1] = clause[1], clause[0]
+                first = clause[0]
+                first_value = values[abs(first)] if first > 0 else -values[abs(first)]
+                if first_value == TRUE:
+                    kept.append(index)
+                    continue
+
+                # look for another literal to watch
+                for k in range(2, len(clause)):
+                    literal = clause[k]
+                    if (values[abs(literal)] if literal > 0 else -values[abs(literal)]) != FALSE:
+                        clause[1], clause[k] = literal, false_literal
+                        watches[literal].append(index)
+                        break
+                else:
+                    kept.append(index)
+                    if first_value == FALSE:
+                        kept.extend(watching[position + 1:])
+                        watches[false_literal] = kept
+                        return index
+                    self.assign(first, index)
+            watches[false_literal] = kept
+        return None
+
+    def analyze(self, conflict):
+        """
+        Returns (learned clause, backjump level) for a conflict clause. The
+        learned clause starts with the negated first unique implication
+        point of the current level, followed by a literal of the backjump level.
+        """
+        level = len(self.trail_limits)
+        learned = [None]
+        seen = set()
+        pending = 0
+        index = len(self.trail) - 1
+        clause = self.clauses[conflict]
+        literal = None
+        while True:
+            for other in clause:
+                if other == literal:
+                    continue
+                variable = abs(other)
+                if variable in seen or self.levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self.bump(variable)
+                if self.levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # resolve on the latest assigned literal of this level in the clause
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            literal = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.clauses[self.reasons[abs(literal)]]
+
+        learned[0] = -literal
+        if len(learned) == 1:
+            return learned, 0
+        deepest = max(range(1, len(learned)), key=lambda i: self.levels[abs(learned[i])])
+        learned[1], learned[deepest] = learned[deepest], learned[1]
+        return learned, self.levels[abs(learned[1])]
+
+    def bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            # rescale every activity before they overflow
+            self.activity = [activity * 1e-100 for activity in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v) for v in range(1, len(self.values))
+                          if self.values[v] == UNASSIGNED]
+            heapq.heapify(self.order)
+        elif self.values[variable] == UNASSIGNED:
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+
+    def backtrack(self, level):
+        """
+        Undoes every assignment above the decision level.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for literal in self.trail[start:]:
+            variable = abs(literal)
+            self.phases[variable] = self.values[variable]
+            self.values[variable] = UNASSIGNED
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.propagated = len(self.trail)
+
+    def pick_variable(self):
+        """
+        Returns the unassigned variable with the highest activity, or None.
+        """
+        while self.order:
+            activity, variable = heapq.heappop(self.order)
+            if self.values[variable] == UNASSIGNED and -activity == self.activity[variable]:
+                return variable
+        for variable in range(1, len(self.values)):
+            if self.values[variable] == UNASSIGNED:
+                return variable
+        return None
+
+    def solve(self, assumptions=()):
+        """
+        Returns True if the clauses are satisfiable with every assumption
+        literal true, leaving a satisfying assignment in self.model
+        (variable -> bool), and False otherwise. Learned clauses are kept
+        for later calls, as they follow from the clauses alone.
+        """
+        self.model = None
+        if not self.ok:
+            return False
+        self.backtrack(0)
+
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    self.ok = False
+                    return False
+                learned, level = self.analyze(conflict)
+                self.backtrack(level)
+                self.assign(learned[0], self.attach(learned) if len(learned) > 1 else None)
+                self.increment /= 0.95
+                continue
+
+            # the first decision levels hold the assumptions
+            level = len(self.trail_limits)
+            if level < len(assumptions):
+                literal = assumptions[level]
+                value = self.value(literal)
+                if value == FALSE:
+                    self.backtrack(0)
+                    return False
+                self.trail_limits.append(len(self.trail))
+                if value == UNASSIGNED:
+                    self.assign(literal, None)
+                continue
+
+            variable = self.pick_variable()
+            if variable is None:
+                self.model = {v: self.values[v] == TRUE for v in range(1, len(self.values))}
+                self.backtrack(0)
+                return True
+            self.trail_limits.append(len(self.trail))
+            self.assign(variable if self.phases[variable] == TRUE else -variable, None)
+
+
+class KnowledgeBase():
+    """
+    Sentences kept as CNF in one solver, so that many queries share the
+    encoding, the propagated facts and every learned clause.
+
+    push() opens a scope: sentences added until the matching pop() are
+    retracted by it. Each scope has a selector variable guarding its clauses,
+    which is passed to the solver as an assumption while the scope is open
+    and fixed false once it is popped.
+    """
+
+    def __init__(self, *sentences):
+        self.formula = CNF()
+        self.solver = Solver()
+        self.loaded = 0
+        self.scopes = []
+        for sentence in sentences:
+            self.add(sentence)
+
+    def add(self, sentence):
+        """
+        Adds a sentence to the knowledge base, within the innermost scope if any.
+        """
+        if not self.scopes:
+            self.formula.add(sentence)
+        elif isinstance(sentence, And):
+            for conjunct in sentence.conjuncts:
+                self.add(conjunct)
+        else:
+            self.formula.add_clause([-self.scopes[-1], self.formula.encode(sentence)])
+        self.loaded = self.solver.load(self.formula, self.loaded)
+
+    def push(self, *sentences):
+        """
+        Opens a scope, adding the sentences to it.
+        """
+        self.scopes.append(self.formula.new_variable())
+        self.loaded = self.solver.load(self.formula, self.loaded)
+        for sentence in sentences:
+            self.add(sentence)
+
+    def pop(self):
+        """
+        Closes the innermost scope, retracting every sentence added in it.
+        """
+        if not self.scopes:
+            raise Exception("no scope to pop")
+        self.formula.add_clause([-self.scopes.pop()])
+        self.loaded = self.solver.load(self.formula, self.loaded)
+
+    def literal(self, sentence):
+        """
+        Returns the literal of a sentence, encoding it first if needed.
+        """
+        literal = self.formula.encode(sentence)
+        self.loaded = self.solver.load(self.formula, self.loaded)
+        return literal
+
+    def consistent(self):
+        """
+        Returns True if some model satisfies every sentence in the knowledge base.
+        """
+        return self.solver.solve(self.scopes)
+
+    def entails(self, query):
+        """
+        Returns True if the knowledge base entails the query.
+        """
+        return not self.solver.solve(self.scopes + [-self.literal(query)])
+
+    def model(self):
+        """
+        Returns a model of the knowledge base as a dict of symbol name
+        to value, or None if it is inconsistent.
+        """
+        if not self.consistent():
+            return None
+        return {name: self.solver.model[variable]
+                for name, variable in self.formula.variables.items()}
+
+
+def entails(knowledge, query):
+    """
+    Returns True if the knowledge base entails the query, by checking that
+    knowledge ∧ ¬query is unsatisfiable.
+    """
+    return KnowledgeBase(knowledge).entails(query)